@@ -0,0 +1,3 @@
+# This file is part of python-markups benchmark suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
@@ -0,0 +1,488 @@
+# This file is part of python-markups benchmark suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+"""Benchmark suite for python-markups.
+
+Run ``python -m benchmarks run --help`` and
+``python -m benchmarks compare --help`` for usage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from typing import Any
+
+from benchmarks.corpus import KINDS, generate_document, get_supported_markups
+
+RESULTS_FORMAT_VERSION = 1
+
+# Markup classes by name, imported from the tree being measured
+MARKUP_CLASSES = {
+    "Markdown": ("markups.markdown", "MarkdownMarkup"),
+    "reStructuredText": ("markups.restructuredtext", "ReStructuredTextMarkup"),
+    "Textile": ("markups.textile", "TextileMarkup"),
+    "asciidoc": ("markups.asciidoc", "AsciiDocMarkup"),
+}
+
+# Modules providing the backends, for revisions which do not have
+# the get_backend_version() method
+BACKEND_MODULES = {
+    "Markdown": "markdown",
+    "reStructuredText": "docutils",
+    "Textile": "textile",
+    "asciidoc": "asciidoc",
+}
+
+FILE_NAMES = (
+    "README.md",
+    "docs/index.rst",
+    "notes.textile",
+    "guide.adoc",
+    "file.markdown",
+    "archive.tar.gz",
+    "Makefile",
+)
+
+IMPORT_SCRIPT = """\
+import sys, time
+start = time.perf_counter()
+import markups
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def parse_size(size: str) -> int:
+    """Converts sizes like ``10K`` or ``1M`` to numbers of bytes."""
+    multipliers = {"K": 1 << 10, "M": 1 << 20}
+    size = size.strip().upper().removesuffix("B")
+    if size and size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def format_size(size: int) -> str:
+    for suffix, multiplier in (("M", 1 << 20), ("K", 1 << 10)):
+        if size >= multiplier and size % multiplier == 0:
+            return f"{size // multiplier}{suffix}"
+    return str(size)
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Returns a percentile using linear interpolation between samples."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples: list[float]) -> dict[str, Any]:
+    return {
+        "runs": len(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "p90": percentile(samples, 0.9),
+        "p99": percentile(samples, 0.99),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def measure_latency(
+    function: Any,
+    min_runs: int,
+    max_runs: int,
+    min_time: float,
+) -> list[float]:
+    """Calls `function` at least `min_runs` times, and then until
+    `min_time` seconds have passed or `max_runs` calls have been made."""
+    function()  # Warm-up
+    samples: list[float] = []
+    total_start = time.perf_counter()
+    while len(samples) < min_runs or (
+        len(samples) < max_runs and time.perf_counter() - total_start < min_time
+    ):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure_peak_memory(function: Any) -> int:
+    """:returns: peak memory allocated by Python during `function` call"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_import(source: str | None, statement: str, repeat: int) -> list[float]:
+    """Measures time of importing markups and running `statement`
+    in new interpreters."""
+    env = os.environ.copy()
+    if source is not None:
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [source, env.get("PYTHONPATH")]),
+        )
+    script = IMPORT_SCRIPT.format(statement=statement)
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(float(output.split()[-1]))
+    return samples
+
+
+def get_convert_file(markup: Any, path: str) -> Any:
+    """Returns a function that converts the file at `path` using `markup`,
+    in the way the measured revision supports."""
+    if hasattr(markup, "convert_file"):
+        return lambda: markup.convert_file(path)
+
+    def convert_file() -> Any:
+        with open(path, encoding="utf-8") as input_file:
+            return markup.convert(input_file.read())
+
+    return convert_file
+
+
+def get_metadata(source: str | None) -> dict[str, Any]:
+    import markups
+
+    metadata: dict[str, Any] = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "markups_version": markups.__version__,
+        "markups_path": os.path.dirname(markups.__file__),
+        "backend_versions": {},
+    }
+    try:
+        metadata["revision"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=source or os.path.dirname(markups.__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata["revision"] = None
+    for name, (module_name, class_name) in MARKUP_CLASSES.items():
+        markup_class = getattr(importlib.import_module(module_name), class_name)
+        if markup_class.available():
+            metadata["backend_versions"][name] = get_backend_version(
+                name,
+                markup_class,
+            )
+    return metadata
+
+
+def get_backend_version(name: str, markup_class: Any) -> str | None:
+    """Returns the backend version, in the way the measured revision
+    supports."""
+    get_version = getattr(markup_class, "get_backend_version", None)
+    if get_version is not None:
+        return str(get_version())
+    backend_module = importlib.import_module(BACKEND_MODULES[name])
+    version = getattr(backend_module, "__version__", None)
+    return None if version is None else str(version)
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.source is not None:
+        sys.path.insert(0, os.path.abspath(args.source))
+    import markups
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    kinds = args.kinds.split(",")
+    markup_names = args.markups.split(",") if args.markups else list(MARKUP_CLASSES)
+    results: list[dict[str, Any]] = []
+
+    def report(result: dict[str, Any]) -> None:
+        results.append(result)
+        line = f"{result['name']:40} median {result['median'] * 1000:10.4g} ms"
+        line += f"  p90 {result['p90'] * 1000:10.4g} ms"
+        if "throughput" in result:
+            line += f"  {result['throughput'] / 1e6:8.2f} MB/s"
+        if "peak_memory" in result:
+            line += f"  peak {result['peak_memory'] / 1e6:8.2f} MB"
+        print(line, file=sys.stderr)
+
+    if not args.no_import:
+        report(
+            {
+                "name": "import/markups",
+                **summarize(measure_import(args.source, "", args.import_runs)),
+            },
+        )
+    for markup_name in markup_names:
+        module_name, class_name = MARKUP_CLASSES[markup_name]
+        markup_class = getattr(importlib.import_module(module_name), class_name)
+        if not markup_class.available():
+            print(f"{markup_name} is not available, skipping.", file=sys.stderr)
+            continue
+        if not args.no_import:
+            statement = (
+                f"from {module_name} import {class_name}\n"
+                f"{class_name}().convert('Hello')"
+            )
+            samples = measure_import(args.source, statement, args.import_runs)
+            report({"name": f"first_convert/{markup_name}", **summarize(samples)})
+        markup = markup_class()
+
+        # Fixed cost of each conversion, measured on a one-line document
+        def convert_line() -> None:
+            for _ in range(100):
+                markup.convert("Hello")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            samples = measure_latency(
+                convert_line,
+                args.min_runs,
+                args.max_runs,
+                args.min_time,
+            )
+        report(
+            {
+                "name": f"per_call/{markup_name}",
+                **summarize([sample / 100 for sample in samples]),
+            },
+        )
+        for kind in kinds:
+            for size in sizes:
+                text = generate_document(markup_name, kind, size)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    samples = measure_latency(
+                        lambda: markup.convert(text),
+                        args.min_runs,
+                        args.max_runs,
+                        args.min_time,
+                    )
+                    peak_memory = measure_peak_memory(lambda: markup.convert(text))
+                result = {
+                    "name": f"convert/{markup_name}/{kind}/{format_size(size)}",
+                    "input_size": len(text.encode()),
+                    **summarize(samples),
+                    "peak_memory": peak_memory,
+                }
+                result["throughput"] = result["input_size"] / result["median"]
+                report(result)
+
+        # Conversion of files, which includes reading them, for the
+        # first kind only (the reading cost does not depend on the kind)
+        for size in sizes:
+            text = generate_document(markup_name, kinds[0], size)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                suffix=markup_class.default_extension,
+                delete=False,
+            ) as input_file:
+                input_file.write(text)
+            input_size = len(text.encode())
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    convert_file = get_convert_file(markup, input_file.name)
+                    samples = measure_latency(
+                        convert_file,
+                        args.min_runs,
+                        args.max_runs,
+                        args.min_time,
+                    )
+                    peak_memory = measure_peak_memory(convert_file)
+            finally:
+                os.remove(input_file.name)
+            result = {
+                "name": f"convert_file/{markup_name}/{kinds[0]}/{format_size(size)}",
+                "input_size": input_size,
+                **summarize(samples),
+                "peak_memory": peak_memory,
+            }
+            result["throughput"] = result["input_size"] / result["median"]
+            report(result)
+
+    def lookup() -> None:
+        for _ in range(1000):
+            for file_name in FILE_NAMES:
+                markups.get_markup_for_file_name(file_name, return_class=True)
+
+    samples = measure_latency(lookup, args.min_runs, args.max_runs, args.min_time)
+    report(
+        {
+            "name": "api/get_markup_for_file_name",
+            **summarize([sample / (1000 * len(FILE_NAMES)) for sample in samples]),
+        },
+    )
+
+    try:
+        metadata = get_metadata(args.source)
+    except Exception as ex:
+        # Do not lose the results because of that
+        print(f"Failed to collect the metadata: {ex!r}", file=sys.stderr)
+        metadata = {"format_version": RESULTS_FORMAT_VERSION, "error": repr(ex)}
+    data = {"metadata": metadata, "results": results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(data, output_file, indent=2)
+            output_file.write("\n")
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline) as baseline_file:
+        baseline = {
+            result["name"]: result for result in json.load(baseline_file)["results"]
+        }
+    with open(args.contender) as contender_file:
+        contender = {
+            result["name"]: result for result in json.load(contender_file)["results"]
+        }
+
+    regressions = 0
+    print(f"{'benchmark':40} {'baseline':>12} {'contender':>12} {'change':>9}")
+    for name, result in contender.items():
+        if name not in baseline:
+            continue
+        old_value = baseline[name].get(args.metric)
+        new_value = result.get(args.metric)
+        if not old_value or new_value is None:
+            continue
+        change = (new_value - old_value) / old_value * 100
+        marker = ""
+        if change > args.threshold:
+            marker = "  regression"
+            regressions += 1
+        elif change < -args.threshold:
+            marker = "  improvement"
+        if args.metric == "peak_memory":
+            values = f"{old_value / 1e6:10.2f}MB {new_value / 1e6:10.2f}MB"
+        else:
+            values = f"{old_value * 1000:10.4g}ms {new_value * 1000:10.4g}ms"
+        print(f"{name:40} {values} {change:+8.1f}%{marker}")
+    if regressions:
+        sys.exit(f"{regressions} benchmarks regressed by more than {args.threshold}%.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.set_defaults(function=run)
+    run_parser.add_argument(
+        "--markups",
+        help="comma-separated markup names (default: all of "
+        f"{', '.join(get_supported_markups())})",
+    )
+    run_parser.add_argument(
+        "--kinds",
+        default=",".join(KINDS),
+        help="comma-separated document kinds (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--sizes",
+        default="1K,10K,100K,1M",
+        help="comma-separated document sizes, up to 10M (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=3,
+        help="minimum number of runs of each benchmark (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--max-runs",
+        type=int,
+        default=100,
+        help="maximum number of runs of each benchmark (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=1.0,
+        help="time in seconds after which no more runs are started, "
+        "unless there were fewer than the minimum (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--import-runs",
+        type=int,
+        default=5,
+        help="number of interpreters started for measuring the import "
+        "time (default: %(default)s)",
+    )
+    run_parser.add_argument(
+        "--no-import",
+        action="store_true",
+        help="do not measure the import time",
+    )
+    run_parser.add_argument(
+        "--source",
+        metavar="DIR",
+        help="directory containing the markups package to measure, for "
+        "example a checkout of another revision (default: the installed one)",
+    )
+    run_parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="JSON file to write the results to (default: standard output)",
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="compare two result files",
+    )
+    compare_parser.set_defaults(function=compare)
+    compare_parser.add_argument("baseline", help="results of the old revision")
+    compare_parser.add_argument("contender", help="results of the new revision")
+    compare_parser.add_argument(
+        "--metric",
+        default="median",
+        choices=("mean", "median", "p90", "p99", "min", "peak_memory"),
+        help="metric to compare (default: %(default)s)",
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="change in percent that is reported as a regression, in "
+        "which case the exit status is non-zero (default: %(default)s)",
+    )
+
+    args = parser.parse_args()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
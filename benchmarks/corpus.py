@@ -0,0 +1,266 @@
+# This file is part of python-markups benchmark suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+"""Generators of benchmark documents.
+
+Documents are built from sections of the selected kind until they reach
+the requested size. The generators are seeded, so the same arguments
+always produce the same document.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+
+KINDS = ("prose", "math", "code", "tables")
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+    "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo"
+).split()
+
+CODE = """\
+def fibonacci(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+print([fibonacci(i) for i in range({number})])"""
+
+FORMULAS = (
+    r"\sum_{{i=1}}^{{{number}}} i^2 = \frac{{n(n+1)(2n+1)}}{{6}}",
+    r"\int_0^{{{number}}} e^{{-x^2}} dx",
+    r"\sqrt{{a_{number}^2 + b^2}}",
+)
+
+
+class _Syntax:
+    """Formatting rules of a markup language."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    def paragraph(self, number: int) -> str:
+        return (
+            f"{self.words(12).capitalize()} {self.emphasis(self.words(2))} "
+            f"{self.words(10)} {self.link(self.words(2), number)} {self.words(8)}."
+        )
+
+    def section(self, kind: str, number: int) -> str:
+        parts = [self.heading(f"Section {number}"), self.paragraph(number)]
+        if kind == "prose":
+            parts += [self.paragraph(number), self.list_items(number)]
+        elif kind == "math":
+            formula = FORMULAS[number % len(FORMULAS)].format(number=number)
+            parts += [
+                f"{self.words(6).capitalize()} {self.inline_math(formula)} "
+                f"{self.words(6)}.",
+                self.display_math(formula),
+            ]
+        elif kind == "code":
+            parts += [self.code_block(CODE.format(number=number))]
+        elif kind == "tables":
+            rows = [
+                [f"{self.words(1)} {number}", self.words(3), str(i)] for i in range(6)
+            ]
+            parts += [self.table(["Name", "Description", "Value"], rows)]
+        return "\n\n".join(parts) + "\n\n"
+
+    def heading(self, text: str) -> str:
+        raise NotImplementedError
+
+    def emphasis(self, text: str) -> str:
+        raise NotImplementedError
+
+    def link(self, text: str, number: int) -> str:
+        raise NotImplementedError
+
+    def list_items(self, number: int) -> str:
+        raise NotImplementedError
+
+    def inline_math(self, formula: str) -> str:
+        raise NotImplementedError
+
+    def display_math(self, formula: str) -> str:
+        raise NotImplementedError
+
+    def code_block(self, code: str) -> str:
+        raise NotImplementedError
+
+    def table(self, header: list[str], rows: list[list[str]]) -> str:
+        raise NotImplementedError
+
+
+class _MarkdownSyntax(_Syntax):
+    def heading(self, text: str) -> str:
+        return f"## {text}"
+
+    def emphasis(self, text: str) -> str:
+        return f"*{text}*"
+
+    def link(self, text: str, number: int) -> str:
+        return f"[{text}](https://example.com/{number})"
+
+    def list_items(self, number: int) -> str:
+        return "\n".join(f"* {self.words(5)} `code_{i}`" for i in range(4))
+
+    def inline_math(self, formula: str) -> str:
+        return rf"\({formula}\)"
+
+    def display_math(self, formula: str) -> str:
+        return f"$$\n{formula}\n$$"
+
+    def code_block(self, code: str) -> str:
+        return f"```python\n{code}\n```"
+
+    def table(self, header: list[str], rows: list[list[str]]) -> str:
+        lines = [" | ".join(header), " | ".join("---" for _ in header)]
+        lines += [" | ".join(row) for row in rows]
+        return "\n".join(lines)
+
+
+class _ReStructuredTextSyntax(_Syntax):
+    def heading(self, text: str) -> str:
+        return f"{text}\n{'-' * len(text)}"
+
+    def emphasis(self, text: str) -> str:
+        return f"*{text}*"
+
+    def link(self, text: str, number: int) -> str:
+        return f"`{text} <https://example.com/{number}>`__"
+
+    def list_items(self, number: int) -> str:
+        return "\n".join(f"* {self.words(5)} ``code_{i}``" for i in range(4))
+
+    def inline_math(self, formula: str) -> str:
+        return f":math:`{formula}`"
+
+    def display_math(self, formula: str) -> str:
+        return f".. math::\n\n   {formula}"
+
+    def code_block(self, code: str) -> str:
+        indented = "\n".join("   " + line if line else "" for line in code.split("\n"))
+        return f".. code:: python\n\n{indented}"
+
+    def table(self, header: list[str], rows: list[list[str]]) -> str:
+        lines = [
+            ".. list-table::",
+            "   :header-rows: 1",
+            "",
+        ]
+        for row in [header, *rows]:
+            lines.append(f"   * - {row[0]}")
+            lines += [f"     - {cell}" for cell in row[1:]]
+        return "\n".join(lines)
+
+
+class _TextileSyntax(_Syntax):
+    def heading(self, text: str) -> str:
+        return f"h2. {text}"
+
+    def emphasis(self, text: str) -> str:
+        return f"_{text}_"
+
+    def link(self, text: str, number: int) -> str:
+        return f'"{text}":https://example.com/{number}'
+
+    def list_items(self, number: int) -> str:
+        return "\n".join(f"* {self.words(5)} @code_{i}@" for i in range(4))
+
+    # Textile has no math support, formulas are kept as code
+    def inline_math(self, formula: str) -> str:
+        return f"@{formula}@"
+
+    def display_math(self, formula: str) -> str:
+        return f"bc. {formula}"
+
+    def code_block(self, code: str) -> str:
+        return f"bc.. {code}\n\np. {self.words(3)}."
+
+    def table(self, header: list[str], rows: list[list[str]]) -> str:
+        lines = ["|_. " + " |_. ".join(header) + " |"]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        return "\n".join(lines)
+
+
+class _AsciiDocSyntax(_Syntax):
+    def heading(self, text: str) -> str:
+        return f"== {text}"
+
+    def emphasis(self, text: str) -> str:
+        return f"_{text}_"
+
+    def link(self, text: str, number: int) -> str:
+        return f"https://example.com/{number}[{text}]"
+
+    def list_items(self, number: int) -> str:
+        return "\n".join(f"* {self.words(5)} `code_{i}`" for i in range(4))
+
+    def inline_math(self, formula: str) -> str:
+        return f"latexmath:[${formula}$]"
+
+    def display_math(self, formula: str) -> str:
+        return f"[latexmath]\n++++\n{formula}\n++++"
+
+    def code_block(self, code: str) -> str:
+        return f"[source,python]\n----\n{code}\n----"
+
+    def table(self, header: list[str], rows: list[list[str]]) -> str:
+        lines = ['[options="header"]', "|==="]
+        lines += ["|" + " |".join(row) for row in [header, *rows]]
+        lines.append("|===")
+        return "\n".join(lines)
+
+
+_syntaxes: dict[str, Callable[[random.Random], _Syntax]] = {
+    "Markdown": _MarkdownSyntax,
+    "reStructuredText": _ReStructuredTextSyntax,
+    "Textile": _TextileSyntax,
+    "asciidoc": _AsciiDocSyntax,
+}
+
+_headers = {
+    "Markdown": "# Benchmark document\n\n",
+    "reStructuredText": f"{'=' * 18}\nBenchmark document\n{'=' * 18}\n\n",
+    "Textile": "h1. Benchmark document\n\n",
+    "asciidoc": "= Benchmark document\n:latexmath:\n\n",
+}
+
+
+def get_supported_markups() -> tuple[str, ...]:
+    """
+    :returns: names of markups for which documents can be generated
+    """
+    return tuple(_syntaxes)
+
+
+def generate_document(markup_name: str, kind: str, size: int, seed: int = 0) -> str:
+    """
+    :param markup_name: the :attr:`~markups.abstract.AbstractMarkup.name`
+                        of the markup
+    :param kind: one of :data:`KINDS`
+    :param size: the minimum size of the document, in characters
+
+    :returns: a document consisting of whole sections, at least `size`
+              characters long
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown document kind: {kind}")
+    syntax = _syntaxes[markup_name](random.Random(seed))
+    parts = [_headers[markup_name]]
+    length = len(parts[0])
+    number = 0
+    while length < size:
+        number += 1
+        section = syntax.section(kind, number)
+        parts.append(section)
+        length += len(section)
+    return "".join(parts)
@@ -1,27 +1,161 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
+import time
+from collections.abc import Iterator
+from typing import Any
 
 import markups
+import markups.common as common
+from markups.abstract import AbstractMarkup
+from markups.buildcache import BuildManifest, get_fingerprint
+
+
+def get_html_options(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "include_stylesheet": args.include_stylesheet,
+        "fallback_title": args.fallback_title,
+        "webenv": args.web_environment,
+    }
 
 
 def export_file(args: argparse.Namespace) -> None:
     markup = markups.get_markup_for_file_name(args.input_file)
-    with open(args.input_file) as fp:
-        text = fp.read()
     if not markup:
         sys.exit("Markup not available.")
-    converted = markup.convert(text)
-
-    html = converted.get_whole_html(
-        include_stylesheet=args.include_stylesheet,
-        fallback_title=args.fallback_title,
-        webenv=args.web_environment,
-    )
+    html_options = get_html_options(args)
 
+    if args.manifest:
+        text = common.read_text_file(args.input_file)
+        manifest = BuildManifest(args.manifest)
+        fingerprint = get_fingerprint(markup, text, **html_options)
+        if manifest.is_up_to_date(args.input_file, args.output_file, fingerprint):
+            return
+        converted = markup.convert(text)
+        del text
+    else:
+        converted = markup.convert_file(args.input_file)
     with open(args.output_file, "w") as output:
-        output.write(html)
+        converted.write_whole_html(output, **html_options)
+
+    if args.manifest:
+        manifest.update(args.input_file, args.output_file, fingerprint)
+        manifest.save()
+
+
+def export_directory(args: argparse.Namespace) -> None:
+    start_time = time.perf_counter()
+    html_options = get_html_options(args)
+    manifest = BuildManifest(args.manifest) if args.manifest else None
+    # Markup instances used for computing fingerprints, per class and directory
+    markup_instances: dict[tuple[type[AbstractMarkup], str], AbstractMarkup] = {}
+    fingerprints: dict[str, dict[str, Any]] = {}
+    # Input paths by their output paths, for detecting collisions
+    output_owners: dict[str, str] = {}
+    input_size = 0
+    skipped_count = 0
+    collision_count = 0
+    failed_count = 0
+
+    def report_failure(input_path: str, error: Exception) -> None:
+        nonlocal failed_count
+        print(f"Failed to convert {input_path}: {error}", file=sys.stderr)
+        failed_count += 1
+
+    def get_output_path(input_path: str) -> str:
+        relative_path = os.path.relpath(input_path, args.input_file)
+        return os.path.join(
+            args.output_file,
+            os.path.splitext(relative_path)[0] + ".html",
+        )
+
+    def read_input_files() -> Iterator[tuple[str, str]]:
+        nonlocal input_size, skipped_count, collision_count
+        for dirpath, dirnames, filenames in os.walk(args.input_file):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                input_path = os.path.join(dirpath, filename)
+                markup_class = markups.get_markup_for_file_name(input_path, True)
+                if markup_class is None:
+                    continue
+                output_path = get_output_path(input_path)
+                owner = output_owners.setdefault(
+                    os.path.normcase(output_path),
+                    input_path,
+                )
+                if owner != input_path:
+                    print(
+                        f"Skipped {input_path}: {output_path} is already "
+                        f"the output of {owner}.",
+                        file=sys.stderr,
+                    )
+                    collision_count += 1
+                    continue
+                try:
+                    text = common.read_text_file(input_path)
+                except (OSError, UnicodeDecodeError) as ex:
+                    report_failure(input_path, ex)
+                    continue
+                if manifest is not None and markup_class.available():
+                    key = (markup_class, dirpath)
+                    if key not in markup_instances:
+                        markup_instances[key] = markup_class(filename=input_path)
+                    fingerprint = get_fingerprint(
+                        markup_instances[key],
+                        text,
+                        **html_options,
+                    )
+                    if manifest.is_up_to_date(input_path, output_path, fingerprint):
+                        skipped_count += 1
+                        continue
+                    fingerprints[input_path] = fingerprint
+                input_size += os.path.getsize(input_path)
+                yield input_path, text
+
+    converted_count = 0
+    try:
+        for input_path, converted in markups.convert_many(
+            read_input_files(),
+            max_workers=args.jobs,
+            return_exceptions=True,
+        ):
+            if converted is None:
+                print(f"Markup not available for {input_path}.", file=sys.stderr)
+                continue
+            if isinstance(converted, Exception):
+                report_failure(input_path, converted)
+                continue
+            output_path = get_output_path(input_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as output:
+                converted.write_whole_html(output, **html_options)
+            converted_count += 1
+            if manifest is not None:
+                manifest.update(input_path, output_path, fingerprints.pop(input_path))
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+    elapsed = time.perf_counter() - start_time
+    megabytes = input_size / 1e6
+    print(
+        f"Converted {converted_count} files ({megabytes:.2f} MB) "
+        f"in {elapsed:.2f} s: {converted_count / elapsed:.1f} files/s, "
+        f"{megabytes / elapsed:.2f} MB/s",
+    )
+    if skipped_count:
+        print(f"Skipped {skipped_count} unchanged files.")
+    if collision_count:
+        print(
+            f"Skipped {collision_count} files with conflicting output paths.",
+            file=sys.stderr,
+        )
+    if failed_count:
+        print(f"Failed to convert {failed_count} files.", file=sys.stderr)
+    if collision_count or failed_count:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -40,8 +174,24 @@ if __name__ == "__main__":
         "--fallback-title",
         help="fallback title of the HTML document",
         metavar="TITLE",
+        default="",
+    )
+    parser.add_argument(
+        "--jobs",
+        help="number of parallel processes when exporting a directory "
+        "(default: number of CPUs)",
+        metavar="N",
+        type=int,
+    )
+    parser.add_argument(
+        "--manifest",
+        help="build manifest file, used to skip files whose output is up to date",
+        metavar="FILE",
     )
-    parser.add_argument("input_file", help="input file")
-    parser.add_argument("output_file", help="output file")
+    parser.add_argument("input_file", help="input file or directory")
+    parser.add_argument("output_file", help="output file or directory")
     args = parser.parse_args()
-    export_file(args)
+    if os.path.isdir(args.input_file):
+        export_directory(args)
+    else:
+        export_file(args)
@@ -2,14 +2,20 @@
 # License: 3-clause BSD, see LICENSE file
 # Copyright: (C) Dmitry Shachnev, 2012-2024
 
-from importlib.metadata import entry_points
-from typing import Literal, overload
+import importlib
+import warnings
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, Literal, overload
 
 from markups.abstract import AbstractMarkup
-from markups.asciidoc import AsciiDocMarkup
-from markups.markdown import MarkdownMarkup
-from markups.restructuredtext import ReStructuredTextMarkup
-from markups.textile import TextileMarkup
+
+if TYPE_CHECKING:
+    from markups.aio import aconvert_many
+    from markups.asciidoc import AsciiDocMarkup
+    from markups.batch import convert_many
+    from markups.markdown import MarkdownMarkup
+    from markups.restructuredtext import ReStructuredTextMarkup
+    from markups.textile import TextileMarkup
 
 __version_tuple__ = (4, 1, 1)
 __version__ = ".".join(map(str, __version_tuple__))
@@ -20,18 +26,108 @@ __all__ = [
     "MarkdownMarkup",
     "ReStructuredTextMarkup",
     "TextileMarkup",
+    "aconvert_many",
+    "clear_markups_cache",
+    "convert_many",
     "find_markup_class_by_name",
     "get_all_markups",
     "get_available_markups",
     "get_markup_for_file_name",
+    "warmup",
 ]
 
-builtin_markups = [
-    MarkdownMarkup,
-    ReStructuredTextMarkup,
-    TextileMarkup,
-    AsciiDocMarkup,
-]
+# The markup classes and submodules are imported on first access, so that
+# importing this package does not import all the backends.
+_lazy_attributes = {
+    "AsciiDocMarkup": "markups.asciidoc",
+    "MarkdownMarkup": "markups.markdown",
+    "ReStructuredTextMarkup": "markups.restructuredtext",
+    "TextileMarkup": "markups.textile",
+    "aconvert_many": "markups.aio",
+    "convert_many": "markups.batch",
+}
+_lazy_submodules = {
+    "aio",
+    "asciidoc",
+    "batch",
+    "buildcache",
+    "common",
+    "diskcache",
+    "instrumentation",
+    "markdown",
+    "mdx_posmap",
+    "restructuredtext",
+    "textile",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "builtin_markups":
+        return [
+            __getattr__("MarkdownMarkup"),
+            __getattr__("ReStructuredTextMarkup"),
+            __getattr__("TextileMarkup"),
+            __getattr__("AsciiDocMarkup"),
+        ]
+    if name in _lazy_submodules:
+        # Importing a submodule sets it as an attribute of this package
+        return importlib.import_module(f"{__name__}.{name}")
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_lazy_attributes[name]), name)
+    globals()[name] = value
+    return value
+
+
+# Markups loaded from the entry points, and indexes for looking them up.
+# The indexes map to (position, markup) pairs, so that lookups can prefer
+# the markup that comes later in the list, like a linear search would.
+_all_markups: list[type[AbstractMarkup]] | None = None
+_markups_by_extension: dict[str, tuple[int, type[AbstractMarkup]]] = {}
+_markups_by_name: dict[str, type[AbstractMarkup]] = {}
+_markups_with_other_extensions: list[tuple[int, str, type[AbstractMarkup]]] = []
+
+
+def _load_markups() -> list[type[AbstractMarkup]]:
+    global _all_markups, _markups_by_extension, _markups_by_name
+    global _markups_with_other_extensions
+    if _all_markups is not None:
+        return _all_markups
+    from importlib.metadata import entry_points
+
+    entrypoints = entry_points(group="pymarkups")
+    all_markups = [entry_point.load() for entry_point in entrypoints]
+    by_extension = {}
+    by_name: dict[str, type[AbstractMarkup]] = {}
+    with_other_extensions = []
+    for position, markup in enumerate(all_markups):
+        for extension in markup.file_extensions:
+            if extension.startswith("."):
+                by_extension[extension] = (position, markup)
+            else:
+                with_other_extensions.append((position, extension, markup))
+        by_name.setdefault(markup.name.lower(), markup)
+    _markups_by_extension = by_extension
+    _markups_by_name = by_name
+    _markups_with_other_extensions = with_other_extensions
+    _all_markups = all_markups
+    return all_markups
+
+
+def _find_markup_class_for_file_name(filename: str) -> type[AbstractMarkup] | None:
+    _load_markups()
+    found_position, markup_class = -1, None
+    dot = filename.find(".")
+    while dot != -1:
+        position, markup = _markups_by_extension.get(filename[dot:], (-1, None))
+        if position > found_position:
+            found_position, markup_class = position, markup
+        dot = filename.find(".", dot + 1)
+    for position, extension, markup in _markups_with_other_extensions:
+        if position > found_position and filename.endswith(extension):
+            found_position, markup_class = position, markup
+    return markup_class
+
 
 # Public API
 
@@ -39,9 +135,22 @@ builtin_markups = [
 def get_all_markups() -> list[type[AbstractMarkup]]:
     """
     :returns: list of all markups (both standard and custom ones)
+
+    The markups are loaded from entry points on the first call and then
+    cached, see :func:`clear_markups_cache`.
     """
-    entrypoints = entry_points(group="pymarkups")
-    return [entry_point.load() for entry_point in entrypoints]
+    return list(_load_markups())
+
+
+def clear_markups_cache() -> None:
+    """Makes the next call of any function in this module load the markups
+    from entry points again.
+
+    This is needed only if packages providing markups are installed or
+    removed while the program is running.
+    """
+    global _all_markups
+    _all_markups = None
 
 
 def get_available_markups() -> list[type[AbstractMarkup]]:
@@ -92,11 +201,7 @@ def get_markup_for_file_name(
     >>> markups.get_markup_for_file_name('bar.rst', return_class=True)
     <class 'markups.restructuredtext.ReStructuredTextMarkup'>
     """
-    markup_class = None
-    for markup in get_all_markups():
-        for extension in markup.file_extensions:
-            if filename.endswith(extension):
-                markup_class = markup
+    markup_class = _find_markup_class_for_file_name(filename)
     if return_class:
         return markup_class
     if markup_class and markup_class.available():
@@ -114,7 +219,46 @@ def find_markup_class_by_name(name: str) -> type[AbstractMarkup] | None:
     >>> markups.find_markup_class_by_name('textile')
     <class 'markups.textile.TextileMarkup'>
     """
-    for markup in get_all_markups():
-        if markup.name.lower() == name.lower():
-            return markup
-    return None
+    _load_markups()
+    return _markups_by_name.get(name.lower())
+
+
+def warmup(markup_names: Iterable[str] | None = None) -> list[type[AbstractMarkup]]:
+    """Imports the backends of markups, creates a markup of each class and
+    converts a small document with it, and fills the caches of Pygments
+    stylesheets and of MathJax location.
+
+    Pre-fork servers can call this in the parent process, so that the
+    worker processes share the imported modules and do not pay for them
+    on their first conversion. Calling :func:`gc.freeze` after this
+    helps to keep the shared memory pages unmodified.
+
+    :param markup_names: names of markups to warm up (by default, all
+                         available markups)
+    :returns: list of markup classes that were warmed up (unavailable
+              markups are skipped)
+    :raises ValueError: if there is no markup with one of the names
+    """
+    if markup_names is None:
+        markup_classes = get_available_markups()
+    else:
+        markup_classes = []
+        for name in markup_names:
+            markup_class = find_markup_class_by_name(name)
+            if markup_class is None:
+                raise ValueError(f"Unknown markup: {name}")
+            if markup_class.available():
+                markup_classes.append(markup_class)
+
+    import markups.common as common
+
+    for markup_class in markup_classes:
+        markup = markup_class()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            converted = markup.convert("Title\n=====\n\nHello, *world*!\n")
+        converted.get_stylesheet()
+        converted.get_javascript()
+    common.warm_up_pygments_stylesheets()
+    common.get_mathjax_url_and_version(webenv=False)
+    return markup_classes
@@ -4,7 +4,15 @@
 
 from __future__ import annotations
 
-from typing import Any
+import bisect
+import io
+import re
+from array import array
+from string import Formatter
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from markups.aio import AsyncConverter
 
 whole_html_template = """<!doctype html>
 <html>
@@ -18,6 +26,41 @@ whole_html_template = """<!doctype html>
 </html>
 """
 
+WRITE_CHUNK_SIZE = 1 << 16
+
+# Values of data-posmap attributes set by the markups, replaced with
+# plain line numbers by take_line_markers(). The STX and ETX characters
+# make them distinct from attributes that come from raw HTML. Only the
+# markers in data-posmap attributes are replaced: the document text may
+# contain the same characters, but the quotes around it are escaped.
+LINE_MARKER = "\x02posmap-line:%d\x03"
+line_marker_re = re.compile(' data-posmap="\x02posmap-line:([0-9]+)\x03"')
+
+
+def take_line_markers(html: str) -> tuple[str, array[int]]:
+    """Replaces :data:`LINE_MARKER` values in `html` with line numbers.
+
+    :returns: the resulting HTML and its position index (see
+              :meth:`ConvertedMarkup.get_position_index`)
+    """
+    pairs = []
+    parts: list[str] = []
+    position = 0
+    removed = 0  # Number of characters removed before the current match
+    for match in line_marker_re.finditer(html):
+        tag_start = html.rfind("<", 0, match.start())
+        line = match.group(1)
+        attribute = f' data-posmap="{line}"'
+        pairs.append((int(line), tag_start - removed))
+        parts += (html[position : match.start()], attribute)
+        removed += match.end() - match.start() - len(attribute)
+        position = match.end()
+    parts.append(html[position:])
+    index = array("I")
+    for pair in sorted(pairs):
+        index.extend(pair)
+    return "".join(parts), index
+
 
 class AbstractMarkup:
     """Abstract class for markup languages.
@@ -47,6 +90,23 @@ class AbstractMarkup:
         """
         return True
 
+    @staticmethod
+    def get_backend_version() -> str:
+        """
+        :returns: version of the third-party module used for conversion,
+                  or an empty string if it is unknown
+
+                  (should be called only when the markup is available)
+        """
+        return ""
+
+    def get_options(self) -> dict[str, Any]:
+        """
+        :returns: options of this instance that affect the conversion
+                  result, for example to be used as a part of cache keys
+        """
+        return {}
+
     def convert(self, text: str) -> ConvertedMarkup:
         """
         :returns: a ConvertedMarkup instance (or a subclass thereof)
@@ -54,6 +114,39 @@ class AbstractMarkup:
         """
         raise NotImplementedError
 
+    def convert_file(self, path: str, encoding: str = "utf-8") -> ConvertedMarkup:
+        """Converts the contents of a file. This uses less memory than
+        reading the file and calling :meth:`convert`, see
+        :func:`markups.common.read_text_file`.
+
+        :returns: a ConvertedMarkup instance, same as :meth:`convert`
+        """
+        import markups.common as common
+
+        return self.convert(common.read_text_file(path, encoding))
+
+    async def aconvert(
+        self,
+        text: str,
+        timeout: float | None = None,
+        converter: AsyncConverter | None = None,
+    ) -> ConvertedMarkup:
+        """Asynchronous version of :meth:`convert`, which runs the conversion
+        in an executor and does not block the event loop.
+
+        :param timeout: timeout in seconds, after which
+                        :exc:`asyncio.TimeoutError` is raised
+        :param converter: a :class:`markups.aio.AsyncConverter` instance
+                          that controls the executor and the number of
+                          concurrent conversions (by default, the one
+                          returned by :func:`markups.aio.get_default_converter`)
+        """
+        from markups.aio import get_default_converter
+
+        if converter is None:
+            converter = get_default_converter()
+        return await converter.convert(self, text, timeout)
+
 
 class ConvertedMarkup:
     """This class encapsulates the title, body, stylesheet and javascript
@@ -63,6 +156,8 @@ class ConvertedMarkup:
     method, usually it should not be instantiated directly.
     """
 
+    _position_index: array[int] | None = None
+
     def __init__(
         self,
         body: str,
@@ -104,6 +199,39 @@ class ConvertedMarkup:
         """
         return self.javascript
 
+    def get_position_index(self) -> array[int]:
+        """
+        :returns: an ``array('I')`` of (source line, body offset) pairs,
+                  stored one after another and sorted by the line number,
+                  where the offset points to the opening tag of an element
+                  generated from that line
+
+        The index is empty if the markup does not provide line numbers
+        (reStructuredText always provides them, Markdown does when the
+        ``posmap`` extension is enabled).
+        """
+        if self._position_index is None:
+            return array("I")
+        return self._position_index
+
+    def get_offset_for_line(self, line: int) -> int | None:
+        """Finds the element generated from the given source line, for
+        example to scroll the preview when the cursor moves.
+
+        :returns: offset in the body of the opening tag of the element
+                  generated from `line` (or from the closest line before
+                  it), or ``None`` if there is no such element
+        """
+        index = self.get_position_index()
+        position = bisect.bisect_right(
+            range(len(index) // 2),
+            line,
+            key=lambda i: index[2 * i],
+        )
+        if position == 0:
+            return None
+        return index[2 * position - 1]
+
     def get_whole_html(
         self,
         custom_headers: str = "",
@@ -124,17 +252,79 @@ class ConvertedMarkup:
         :param webenv: like in :meth:`~.ConvertedMarkup.get_javascript`
                        above
         """
+        context = self._get_whole_html_context(
+            custom_headers,
+            include_stylesheet,
+            fallback_title,
+            webenv,
+        )
+        return whole_html_template.format(**context)
+
+    def write_whole_html(
+        self,
+        fp: IO[Any] | io.RawIOBase,
+        custom_headers: str = "",
+        include_stylesheet: bool = True,
+        fallback_title: str = "",
+        webenv: bool = False,
+    ) -> None:
+        """Writes the same HTML as :meth:`~.ConvertedMarkup.get_whole_html`
+        returns to a file object, without building the whole document
+        in memory.
+
+        :param fp: a text file object, or a binary one (an instance of
+                   :class:`io.RawIOBase` or :class:`io.BufferedIOBase`),
+                   in which case the HTML is encoded to UTF-8
+
+        The other parameters are the same as for
+        :meth:`~.ConvertedMarkup.get_whole_html`.
+        """
+        context = self._get_whole_html_context(
+            custom_headers,
+            include_stylesheet,
+            fallback_title,
+            webenv,
+        )
+        binary = isinstance(fp, (io.RawIOBase, io.BufferedIOBase))
+        output: Any = fp
+        if isinstance(fp, io.RawIOBase):
+            # Raw streams may write only a part of the data, a buffered
+            # writer repeats the writes until all of it is written.
+            output = io.BufferedWriter(fp, WRITE_CHUNK_SIZE)
+        for literal_text, field_name, _, _ in Formatter().parse(whole_html_template):
+            parts = [literal_text]
+            if field_name is not None:
+                parts.append(context[field_name])
+            for part in parts:
+                if not binary:
+                    output.write(part)
+                    continue
+                # Encode long parts (like the body) in chunks, so that
+                # the encoded copy of the whole part is never needed.
+                for start in range(0, len(part), WRITE_CHUNK_SIZE):
+                    output.write(part[start : start + WRITE_CHUNK_SIZE].encode())
+        if isinstance(output, io.BufferedWriter):
+            output.flush()
+            # Do not let the writer close the stream when it is collected
+            output.detach()
+
+    def _get_whole_html_context(
+        self,
+        custom_headers: str,
+        include_stylesheet: bool,
+        fallback_title: str,
+        webenv: bool,
+    ) -> dict[str, str]:
         stylesheet = (
             '<style type="text/css">\n' + self.get_stylesheet() + "</style>\n"
             if include_stylesheet
             else ""
         )
 
-        context = {
+        return {
             "body": self.get_document_body(),
             "title": self.get_document_title() or fallback_title,
             "javascript": self.get_javascript(webenv),
             "stylesheet": stylesheet,
             "custom_headers": custom_headers,
         }
-        return whole_html_template.format(**context)
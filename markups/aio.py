@@ -0,0 +1,201 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from markups.abstract import AbstractMarkup, ConvertedMarkup
+from markups.batch import _convert_in_worker
+
+
+class AsyncConverter:
+    """Runs conversions in an executor, so that they do not block
+    the event loop.
+
+    :param executor: a :class:`concurrent.futures.ThreadPoolExecutor` or
+                     :class:`~concurrent.futures.ProcessPoolExecutor`
+                     (by default, a new thread pool is created); with
+                     a process pool, markups are created in the worker
+                     processes from the markup class and file name,
+                     so any other constructor arguments are not used
+    :param max_pending: maximum number of conversions submitted to the
+                        executor and not finished yet; further conversions
+                        wait until some of them finish (by default, twice
+                        the number of CPUs)
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_pending: int | None = None,
+    ):
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="markups")
+        self.max_pending = max_pending or 2 * (os.cpu_count() or 1)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        return self._semaphore
+
+    async def convert(
+        self,
+        markup: AbstractMarkup,
+        text: str,
+        timeout: float | None = None,
+    ) -> ConvertedMarkup:
+        """Converts `text` using `markup` in the executor.
+
+        :param timeout: if the conversion does not finish in `timeout`
+                        seconds (including the time spent waiting for
+                        a free slot), :exc:`asyncio.TimeoutError` is raised
+
+        If the calling task is cancelled or times out, the conversion is
+        cancelled if it has not started yet. A conversion that has already
+        started keeps running until it finishes, and keeps occupying its
+        slot until then.
+        """
+        return await asyncio.wait_for(self._convert(markup, text), timeout)
+
+    async def _convert(self, markup: AbstractMarkup, text: str) -> ConvertedMarkup:
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        future: Future[ConvertedMarkup]
+        try:
+            if isinstance(self.executor, ProcessPoolExecutor):
+                future = self.executor.submit(
+                    _convert_in_worker,
+                    type(markup),
+                    markup.filename or "",
+                    text,
+                )
+            else:
+                # Run in the current context, so that the instrumentation
+                # collector (if any) receives the measurements
+                context = contextvars.copy_context()
+                future = self.executor.submit(context.run, markup.convert, text)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def release(future: Future[ConvertedMarkup]) -> None:
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # The event loop is closed
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+
+_default_converter: AsyncConverter | None = None
+
+
+def get_default_converter() -> AsyncConverter:
+    """
+    :returns: the converter used by
+              :meth:`~markups.abstract.AbstractMarkup.aconvert` and
+              :func:`aconvert_many` when no converter is passed
+    """
+    global _default_converter
+    if _default_converter is None:
+        _default_converter = AsyncConverter()
+    return _default_converter
+
+
+def set_default_converter(converter: AsyncConverter) -> None:
+    """Replaces the converter returned by :func:`get_default_converter`."""
+    global _default_converter
+    _default_converter = converter
+
+
+async def _iterate(
+    items: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]],
+) -> AsyncIterator[tuple[str, str]]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def aconvert_many(
+    items: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]],
+    timeout: float | None = None,
+    converter: AsyncConverter | None = None,
+    return_exceptions: bool = False,
+) -> AsyncIterator[tuple[str, Any]]:
+    """Asynchronous counterpart of :func:`~markups.convert_many`.
+
+    The documents are converted using `converter` (by default, the one
+    returned by :func:`get_default_converter`). Markup instances are shared
+    between documents of the same class in the same directory.
+
+    :param items: iterable or asynchronous iterable of (file name, text)
+                  pairs; new items are taken from it only when fewer than
+                  ``converter.max_pending`` conversions are in progress
+    :param timeout: timeout for every document, in seconds
+    :param return_exceptions: if true, exceptions raised by conversions
+                              (including :exc:`asyncio.TimeoutError`) are
+                              returned instead of converted markups,
+                              otherwise the first exception is propagated
+
+    :returns: asynchronous iterator of (file name, converted markup) pairs,
+              in order of completion; the converted markup is ``None`` if
+              no available markup is associated with the file name
+    """
+    from markups import get_markup_for_file_name
+
+    if converter is None:
+        converter = get_default_converter()
+    markup_instances: dict[tuple[type[AbstractMarkup], str], AbstractMarkup] = {}
+
+    async def convert(markup: AbstractMarkup, filename: str, text: str) -> Any:
+        try:
+            return filename, await converter.convert(markup, text, timeout)
+        except Exception as ex:
+            if return_exceptions:
+                return filename, ex
+            raise
+
+    tasks: set[asyncio.Task[Any]] = set()
+    try:
+        async for filename, text in _iterate(items):
+            markup_class = get_markup_for_file_name(filename, return_class=True)
+            if markup_class is None or not markup_class.available():
+                yield filename, None
+                continue
+            key = (markup_class, os.path.dirname(filename))
+            if key not in markup_instances:
+                markup_instances[key] = markup_class(filename=filename)
+            markup = markup_instances[key]
+            tasks.add(asyncio.ensure_future(convert(markup, filename, text)))
+            if len(tasks) >= converter.max_pending:
+                done, tasks = await asyncio.wait(
+                    tasks,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    yield task.result()
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -2,14 +2,50 @@
 # License: 3-clause BSD, see LICENSE file
 # Copyright: (C) Dave Kuhlman, 2022
 
+import functools
+import html
 import importlib
+import threading
 import warnings
+from collections.abc import Iterator
 from io import StringIO
 
 import markups.common as common
+import markups.instrumentation as instrumentation
 from markups.abstract import AbstractMarkup, ConvertedMarkup
 
 
+def _find_elements(source: str, tag: str) -> Iterator[tuple[int, int, int]]:
+    """Yields (element start, content start, content end) positions
+    of all `tag` elements in `source`."""
+    start = source.find(f"<{tag}")
+    while start >= 0:
+        content_start = source.index(">", start) + 1
+        end = source.index(f"</{tag}>", content_start)
+        yield start, content_start, end
+        start = source.find(f"<{tag}", end)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_static_resources(head: str) -> tuple[str, str]:
+    """Extracts the stylesheet and the javascript from the page head.
+
+    The head (without the title) depends only on the backend and the
+    attributes, so this is computed once for each combination of them,
+    and the resulting strings are shared between converted documents.
+    """
+    stylesheet = "".join(
+        head[content_start:end]
+        for _, content_start, end in _find_elements(head, "style")
+    )
+    javascript = ""
+    for start, _, end in _find_elements(head, "script"):
+        # Include the text up to the next tag, as the old lxml-based code did
+        tail_end = head.find("<", end + len("</script>"))
+        javascript += head[start : tail_end if tail_end >= 0 else len(head)]
+    return stylesheet, javascript
+
+
 class AsciiDocMarkup(AbstractMarkup):
     """Markup class for AsciiDoc language.
     Inherits :class:`~markups.abstract.AbstractMarkup`.
@@ -25,18 +61,32 @@ class AsciiDocMarkup(AbstractMarkup):
     file_extensions = (".adoc", ".asciidoc")
     default_extension = ".adoc"
 
+    # asciidoc.py keeps the document state in global variables,
+    # so conversions cannot run in parallel threads.
+    _lock = threading.Lock()
+
     @staticmethod
     def available() -> bool:
         try:
             importlib.import_module("asciidoc")
-            importlib.import_module("lxml")
         except ImportError:
             return False
         return True
 
+    @staticmethod
+    def get_backend_version() -> str:
+        import asciidoc
+
+        return str(asciidoc.__version__)
+
     def convert(self, text: str) -> ConvertedMarkup:
+        with instrumentation.phase(self.name, "convert", len(text)) as convert_phase:
+            converted = self._convert(text)
+            convert_phase.set_output_size(len(converted.body))
+        return converted
+
+    def _convert(self, text: str) -> ConvertedMarkup:
         import asciidoc
-        from lxml import etree
 
         outfile = StringIO()
         infile = StringIO(text)
@@ -46,42 +96,41 @@ class AsciiDocMarkup(AbstractMarkup):
             ("--attribute", "footer-style=none"),
             ("--out-file", outfile),
         ]
-        try:
-            asciidoc.execute(None, opts, [infile])
-        except SystemExit as ex:
-            warnings.warn(str(ex.__context__), SyntaxWarning)
-            pass
-        result = outfile.getvalue()
-        parser = etree.HTMLParser()
-        root_element = etree.fromstring(result, parser)
-        head_element = root_element.xpath("./head")[0]
-        title_element = root_element.xpath("./head/title")[0]
-        style_elements = root_element.xpath("./head/style")
-        javascript_elements = root_element.xpath("./head/script")
-        body_element = root_element.xpath("./body")[0]
-        head = ""
-        for child in head_element.getchildren():
-            head += etree.tostring(
-                child,
-                encoding="unicode",
-                method="html",
-            )
-        body = ""
-        for child in body_element.getchildren():
-            body += etree.tostring(
-                child,
-                encoding="unicode",
-                method="html",
-            )
-        title = title_element.text
-        stylesheet = ""
-        for style_element in style_elements:
-            stylesheet += style_element.text
-        javascript = ""
-        for javascript_element in javascript_elements:
-            javascript += etree.tostring(
-                javascript_element,
-                encoding="unicode",
-                method="html",
-            )
+        with self._lock:
+            with instrumentation.phase(self.name, "render", len(text)) as phase:
+                try:
+                    asciidoc.execute(None, opts, [infile])
+                except SystemExit as ex:
+                    warnings.warn(str(ex.__context__), SyntaxWarning)
+                    pass
+                document = outfile.getvalue()
+                phase.set_output_size(len(document))
+        with instrumentation.phase(self.name, "split", len(document)):
+            return self._split_document(document)
+
+    @staticmethod
+    def _split_document(document: str) -> ConvertedMarkup:
+        """Splits the HTML page produced by asciidoc.py into parts.
+
+        The page is generated from the backend's templates, so its
+        structure is known and the parts can be sliced out of it without
+        parsing the whole document.
+        """
+        head_start = document.index(">", document.index("<head")) + 1
+        head_end = document.index("</head>", head_start)
+        head = document[head_start:head_end]
+        body_start = document.index(">", document.index("<body", head_end)) + 1
+        body_end = document.rfind("</body>")
+        if body_end < 0:
+            # The output is truncated when asciidoc.py exits on an error
+            body_end = len(document)
+        body = document[body_start:body_end].lstrip("\n")
+
+        title = ""
+        title_start = head.find("<title>")
+        if title_start >= 0:
+            title_end = head.find("</title>", title_start)
+            title = html.unescape(head[title_start + len("<title>") : title_end])
+            head = head[:title_start] + head[title_end:]
+        stylesheet, javascript = _get_static_resources(head)
         return ConvertedMarkup(body, title, stylesheet, javascript)
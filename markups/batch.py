@@ -0,0 +1,136 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Literal, overload
+
+from markups.abstract import AbstractMarkup, ConvertedMarkup
+
+# Markup instances created in the current (worker) process, keyed by
+# markup class and directory (the directory matters for markups that read
+# per-directory configuration files, like Markdown).
+_worker_markups: dict[tuple[type[AbstractMarkup], str], AbstractMarkup] = {}
+
+
+def _convert_in_worker(
+    markup_class: type[AbstractMarkup],
+    filename: str,
+    text: str,
+) -> ConvertedMarkup:
+    key = (markup_class, os.path.dirname(filename))
+    markup = _worker_markups.get(key)
+    if markup is None:
+        markup = _worker_markups[key] = markup_class(filename=filename)
+    markup.filename = filename
+    return markup.convert(text)
+
+
+@overload
+def convert_many(
+    items: Iterable[tuple[str, str]],
+    ordered: bool = False,
+    max_workers: int | None = None,
+    max_pending: int | None = None,
+    return_exceptions: Literal[False] = False,
+) -> Iterator[tuple[str, ConvertedMarkup | None]]: ...
+
+
+@overload
+def convert_many(
+    items: Iterable[tuple[str, str]],
+    ordered: bool = False,
+    max_workers: int | None = None,
+    max_pending: int | None = None,
+    *,
+    return_exceptions: bool,
+) -> Iterator[tuple[str, ConvertedMarkup | Exception | None]]: ...
+
+
+def convert_many(
+    items: Iterable[tuple[str, str]],
+    ordered: bool = False,
+    max_workers: int | None = None,
+    max_pending: int | None = None,
+    return_exceptions: bool = False,
+) -> Iterator[tuple[str, ConvertedMarkup | Exception | None]]:
+    """Converts many documents in parallel using a pool of processes.
+
+    The markup for each document is chosen using
+    :func:`~markups.get_markup_for_file_name`. Each worker process reuses
+    one markup instance per markup class and directory.
+
+    :param items: iterable of (file name, text) pairs; it is consumed
+                  lazily, so it can be a generator reading files on demand
+    :param ordered: if true, results are returned in the order of `items`,
+                    otherwise they are returned as soon as they are ready
+    :param max_workers: number of worker processes (defaults to the number
+                        of CPUs)
+    :param max_pending: maximum number of documents submitted to the pool
+                        but not yet returned (defaults to four times
+                        `max_workers`)
+    :param return_exceptions: if true, exceptions raised by conversions
+                              are returned instead of converted markups,
+                              otherwise the first exception is propagated
+
+    :returns: iterator of (file name, converted markup) pairs; the
+              converted markup is ``None`` if no available markup is
+              associated with the file name
+    """
+    from markups import get_markup_for_file_name
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 4 * max_workers
+
+    def get_result(
+        future: Future[ConvertedMarkup | None],
+    ) -> ConvertedMarkup | Exception | None:
+        exception = future.exception()
+        if return_exceptions and isinstance(exception, Exception):
+            return exception
+        return future.result()
+
+    executor = ProcessPoolExecutor(max_workers)
+    queue: deque[tuple[str, Future[ConvertedMarkup | None]]] = deque()
+    pending: dict[Future[ConvertedMarkup | None], str] = {}
+    try:
+        for filename, text in items:
+            markup_class = get_markup_for_file_name(filename, return_class=True)
+            future: Future[ConvertedMarkup | None]
+            if markup_class is None or not markup_class.available():
+                future = Future()
+                future.set_result(None)
+            else:
+                future = executor.submit(
+                    _convert_in_worker,
+                    markup_class,
+                    filename,
+                    text,
+                )
+            if ordered:
+                queue.append((filename, future))
+                while len(queue) >= max_pending:
+                    filename, future = queue.popleft()
+                    yield filename, get_result(future)
+            else:
+                pending[future] = filename
+                while len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), get_result(future)
+        while queue:
+            filename, future = queue.popleft()
+            yield filename, get_result(future)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), get_result(future)
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,109 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any
+
+import markups.common as common
+from markups.abstract import AbstractMarkup
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+def get_fingerprint(
+    markup: AbstractMarkup,
+    text: str,
+    **options: Any,
+) -> dict[str, Any]:
+    """
+    :param markup: the markup instance that will convert the document
+    :param text: the document text
+    :param options: any other options that affect the output (for example,
+                    the arguments of
+                    :meth:`~markups.abstract.ConvertedMarkup.get_whole_html`)
+
+    :returns: a JSON-serializable dictionary describing everything that
+              the converted document depends on
+    """
+    from markups import __version__
+
+    fingerprint = {
+        "sha256": hashlib.sha256(text.encode()).hexdigest(),
+        "markup": markup.name,
+        "markups_version": __version__,
+        "backend_version": markup.get_backend_version(),
+        "markup_options": markup.get_options(),
+        "pygments_style": common.PYGMENTS_STYLE,
+        "mathjax": common.get_mathjax_url_and_version(webenv=False),
+        "options": options,
+    }
+    # Round-trip through JSON, so that the result compares equal
+    # to the one loaded from the manifest file.
+    result: dict[str, Any] = json.loads(
+        json.dumps(fingerprint, default=repr, sort_keys=True),
+    )
+    return result
+
+
+class BuildManifest:
+    """Keeps track of converted files, so that the files whose output
+    is still valid can be skipped in the next build.
+
+    The manifest is stored as a human-readable JSON file, which maps
+    each input file name to the output file name and the fingerprint
+    returned by :func:`get_fingerprint`.
+
+    :param path: path of the manifest file (it does not need to exist)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        try:
+            with open(path) as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == MANIFEST_FORMAT_VERSION:
+            self.entries = data["entries"]
+
+    def is_up_to_date(
+        self,
+        input_path: str,
+        output_path: str,
+        fingerprint: dict[str, Any],
+    ) -> bool:
+        """
+        :returns: whether `output_path` exists and was produced from
+                  `input_path` with the same fingerprint
+        """
+        entry = self.entries.get(input_path)
+        return (
+            entry is not None
+            and entry["output"] == output_path
+            and entry["fingerprint"] == fingerprint
+            and os.path.exists(output_path)
+        )
+
+    def update(
+        self,
+        input_path: str,
+        output_path: str,
+        fingerprint: dict[str, Any],
+    ) -> None:
+        """Records that `output_path` was produced from `input_path`."""
+        self.entries[input_path] = {"output": output_path, "fingerprint": fingerprint}
+
+    def save(self) -> None:
+        """Writes the manifest file (atomically)."""
+        data = {"version": MANIFEST_FORMAT_VERSION, "entries": self.entries}
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(data, manifest_file, indent=2, sort_keys=True)
+            manifest_file.write("\n")
+        os.replace(temp_path, self.path)
@@ -2,7 +2,11 @@
 # License: 3-clause BSD, see LICENSE file
 # Copyright: (C) Dmitry Shachnev, 2012-2025
 
+import functools
+import mmap
 import os.path
+import warnings
+from collections.abc import Iterable
 
 # Some common constants and functions
 (LANGUAGE_HOME_PAGE, MODULE_HOME_PAGE, SYNTAX_DOCUMENTATION) = range(3)
@@ -22,6 +26,8 @@ MATHJAX3_LOCAL_FILES = (
 MATHJAX_WEB_URL = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-chtml.js"
 
 PYGMENTS_STYLE = "default"
+# CSS selectors used by the standard markups for highlighted code
+PYGMENTS_SELECTORS = (".codehilite", ".highlight", ".code")
 
 
 def get_pygments_stylesheet(selector: str | None, style: str | None = None) -> str:
@@ -29,6 +35,11 @@ def get_pygments_stylesheet(selector: str | None, style: str | None = None) -> s
         style = PYGMENTS_STYLE
     if style == "":
         return ""
+    return _get_pygments_stylesheet(selector, style)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_pygments_stylesheet(selector: str | None, style: str) -> str:
     try:
         from pygments.formatters import HtmlFormatter
     except ImportError:
@@ -39,12 +50,80 @@ def get_pygments_stylesheet(selector: str | None, style: str | None = None) -> s
         return defs + "\n"
 
 
+def warm_up_pygments_stylesheets(
+    styles: Iterable[str] | None = None,
+    selectors: Iterable[str | None] = PYGMENTS_SELECTORS,
+) -> None:
+    """Generates and caches the stylesheets for the given Pygments styles
+    (by default, for :data:`PYGMENTS_STYLE`) and CSS selectors."""
+    if styles is None:
+        styles = [PYGMENTS_STYLE]
+    selectors = list(selectors)
+    for style in styles:
+        for selector in selectors:
+            get_pygments_stylesheet(selector, style)
+
+
+def clear_pygments_stylesheet_cache() -> None:
+    """Clears the cache of generated stylesheets. Stylesheets for the new
+    value of :data:`PYGMENTS_STYLE` are generated anyway, so this is only
+    needed to free memory, or when Pygments styles are changed at runtime."""
+    _get_pygments_stylesheet.cache_clear()
+
+
+def read_text_file(path: str, encoding: str = "utf-8") -> str:
+    """Reads a text file and normalizes its line endings to ``\\n``, like
+    :func:`open` in text mode does.
+
+    The file is memory-mapped and decoded in one step, so its contents are
+    not kept in memory both as bytes and as a string, which matters for
+    large files.
+    """
+    with open(path, "rb") as file:
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and non-regular files cannot be mapped
+            text = file.read().decode(encoding)
+        else:
+            with mapping:
+                text = str(mapping, encoding)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
 def get_mathjax_url_and_version(webenv: bool) -> tuple[str, int]:
     if not webenv:
-        for path in MATHJAX3_LOCAL_FILES:
-            if os.path.exists(path):
-                return f"file://{path}", 3
-        for path in MATHJAX2_LOCAL_FILES:
-            if os.path.exists(path):
-                return f"file://{path}", 2
+        local_mathjax = _get_local_mathjax_url_and_version()
+        if local_mathjax is not None:
+            return local_mathjax
     return MATHJAX_WEB_URL, 3
+
+
+@functools.cache
+def _get_local_mathjax_url_and_version() -> tuple[str, int] | None:
+    url = os.getenv("MARKUPS_MATHJAX_URL")
+    if url:
+        version = os.getenv("MARKUPS_MATHJAX_VERSION")
+        if version in ("2", "3"):
+            return url, int(version)
+        if version:
+            warnings.warn(
+                f"Unsupported MARKUPS_MATHJAX_VERSION value: {version!r}",
+                RuntimeWarning,
+            )
+        return url, 2 if url.endswith("/MathJax.js") else 3
+    for path in MATHJAX3_LOCAL_FILES:
+        if os.path.exists(path):
+            return f"file://{path}", 3
+    for path in MATHJAX2_LOCAL_FILES:
+        if os.path.exists(path):
+            return f"file://{path}", 2
+    return None
+
+
+def clear_mathjax_cache() -> None:
+    """Makes :func:`get_mathjax_url_and_version` look for a local copy
+    of MathJax again (the result of the lookup is cached otherwise)."""
+    _get_local_mathjax_url_and_version.cache_clear()
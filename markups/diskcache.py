@@ -0,0 +1,260 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any
+
+from markups.abstract import AbstractMarkup, ConvertedMarkup
+from markups.buildcache import get_fingerprint
+
+DISK_CACHE_FORMAT_VERSION = 3
+
+_schema = (
+    "DROP TABLE IF EXISTS entries",
+    "DROP TABLE IF EXISTS total_size",
+    """CREATE TABLE entries (
+        key TEXT PRIMARY KEY,
+        class TEXT NOT NULL,
+        data TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_used REAL NOT NULL
+    )""",
+    "CREATE INDEX entries_last_used ON entries (last_used)",
+    # Total size of all entries, kept up to date by every change, so that
+    # it does not need to be computed when storing an entry
+    "CREATE TABLE total_size (size INTEGER NOT NULL)",
+    "INSERT INTO total_size VALUES (0)",
+    f"PRAGMA user_version = {DISK_CACHE_FORMAT_VERSION}",
+)
+
+
+class DiskCache:
+    """Persistent cache of converted documents, stored in an SQLite
+    database, which can be shared by many threads and processes.
+
+    The cache key is computed from the markup name and options, the
+    backend version and the document text (see
+    :func:`markups.buildcache.get_fingerprint`).
+
+    The attributes of converted documents are stored together with their
+    class, so cached documents have the same class as the documents
+    returned by :meth:`~markups.abstract.AbstractMarkup.convert`.
+    Documents with public attributes that are not JSON-serializable are
+    not stored. Neither are documents whose class is not defined in one
+    of the `trusted_modules` (or their submodules), so that a tampered
+    cache file cannot make the application import arbitrary modules.
+
+    :param path: path of the database file (it is created if it does
+                 not exist)
+    :param max_size: maximum total size of stored documents, in bytes;
+                     when it is exceeded, the least recently used
+                     documents are removed
+    :param trusted_modules: names of packages or modules whose classes of
+                            converted documents can be stored
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 100 * 1024 * 1024,
+        trusted_modules: tuple[str, ...] = ("markups",),
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.trusted_modules = trusted_modules
+        #: number of documents found in the cache
+        self.hits = 0
+        #: number of documents not found in the cache
+        self.misses = 0
+        self._local = threading.local()
+        self._counters_lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # SQLite connections can be used neither by other threads
+        # nor by child processes.
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            # Readers do not block the writer, and vice versa
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                # Lock the database, so that only one process creates the table
+                connection.execute("BEGIN IMMEDIATE")
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != DISK_CACHE_FORMAT_VERSION:
+                    for statement in _schema:
+                        connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def get_key(markup: AbstractMarkup, text: str) -> str:
+        """
+        :returns: the key under which the result of converting `text`
+                  using `markup` is stored
+        """
+        fingerprint = get_fingerprint(markup, text)
+        return hashlib.sha256(
+            json.dumps(fingerprint, sort_keys=True).encode(),
+        ).hexdigest()
+
+    def get(self, markup: AbstractMarkup, text: str) -> ConvertedMarkup | None:
+        """
+        :returns: the cached result of converting `text` using `markup`,
+                  or ``None`` if it is not in the cache
+        """
+        return self._get(self.get_key(markup, text))
+
+    def put(
+        self,
+        markup: AbstractMarkup,
+        text: str,
+        converted: ConvertedMarkup,
+    ) -> None:
+        """Stores `converted` as the result of converting `text`
+        using `markup`."""
+        self._put(self.get_key(markup, text), converted)
+
+    def convert(self, markup: AbstractMarkup, text: str) -> ConvertedMarkup:
+        """Returns the cached result of converting `text` using `markup`,
+        or converts it and stores the result in the cache."""
+        key = self.get_key(markup, text)
+        converted = self._get(key)
+        if converted is None:
+            converted = markup.convert(text)
+            self._put(key, converted)
+        return converted
+
+    def _get(self, key: str) -> ConvertedMarkup | None:
+        connection = self._get_connection()
+        row = connection.execute(
+            "SELECT class, data FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        converted = None if row is None else self._load_converted(*row)
+        with self._counters_lock:
+            if converted is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if converted is not None:
+            try:
+                with connection:
+                    connection.execute(
+                        "UPDATE entries SET last_used = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+            except sqlite3.OperationalError:
+                pass  # The database is busy, the access time is not important
+        return converted
+
+    def _put(self, key: str, converted: ConvertedMarkup) -> None:
+        converted_class = type(converted)
+        if not self._is_trusted(converted_class.__module__):
+            return
+        # Private attributes are caches, which can be rebuilt, except for
+        # the position index
+        attributes = {
+            name: value
+            for name, value in vars(converted).items()
+            if not name.startswith("_")
+        }
+        if converted._position_index is not None:
+            attributes["_position_index"] = converted._position_index.tolist()
+        try:
+            data = json.dumps(attributes)
+        except TypeError:
+            return
+        if len(data) > self.max_size:
+            return
+        connection = self._get_connection()
+        with connection:
+            # Take the write lock now, rather than upgrading a read lock
+            # later, which may fail if another process writes in between
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT size FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    f"{converted_class.__module__}:{converted_class.__qualname__}",
+                    data,
+                    len(data),
+                    time.time(),
+                ),
+            )
+            size_change = len(data) - (row[0] if row else 0)
+            connection.execute(
+                "UPDATE total_size SET size = size + ?",
+                (size_change,),
+            )
+            (total_size,) = connection.execute(
+                "SELECT size FROM total_size",
+            ).fetchone()
+            if total_size > self.max_size:
+                self._evict(connection, total_size - self.max_size)
+
+    @staticmethod
+    def _evict(connection: sqlite3.Connection, excess: int) -> None:
+        """Deletes the least recently used entries with the total size
+        of at least `excess`."""
+        keys = []
+        freed = 0
+        # Uses the last_used index, so only the deleted rows are read
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY last_used",
+        ):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+        connection.execute("UPDATE total_size SET size = size - ?", (freed,))
+
+    def clear(self) -> None:
+        """Removes all documents from the cache."""
+        with self._get_connection() as connection:
+            connection.execute("DELETE FROM entries")
+            connection.execute("UPDATE total_size SET size = 0")
+
+    def _is_trusted(self, module_name: str) -> bool:
+        return any(
+            module_name == name or module_name.startswith(name + ".")
+            for name in self.trusted_modules
+        )
+
+    def _load_converted(self, class_path: str, data: str) -> ConvertedMarkup | None:
+        module_name, _, class_name = class_path.partition(":")
+        if not self._is_trusted(module_name):
+            return None
+        try:
+            converted_class: Any = importlib.import_module(module_name)
+            for name in class_name.split("."):
+                converted_class = getattr(converted_class, name)
+        except (ImportError, AttributeError):
+            return None
+        if not (
+            isinstance(converted_class, type)
+            and issubclass(converted_class, ConvertedMarkup)
+        ):
+            return None
+        attributes = json.loads(data)
+        if "_position_index" in attributes:
+            attributes["_position_index"] = array("I", attributes["_position_index"])
+        converted: ConvertedMarkup = converted_class.__new__(converted_class)
+        vars(converted).update(attributes)
+        return converted
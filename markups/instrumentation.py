@@ -0,0 +1,300 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+"""Optional instrumentation of conversions.
+
+The markups measure the phases of each conversion (for example, loading
+the extensions, rendering the document and generating the stylesheet)
+and report them to the collector that is active in the current context:
+
+>>> from markups import TextileMarkup
+>>> from markups.instrumentation import Collector
+>>> with Collector() as collector:
+...     _ = TextileMarkup().convert('h1. Hello')
+>>> [record.phase for record in collector.records]
+['render', 'convert']
+
+When no collector is active, measuring a phase costs one context
+variable lookup.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Iterable
+from types import TracebackType
+from typing import Any
+
+#: upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_current_collector: contextvars.ContextVar[Collector | None] = contextvars.ContextVar(
+    "markups_collector",
+    default=None,
+)
+
+
+class PhaseRecord:
+    """A measurement of one phase of a conversion."""
+
+    __slots__ = ("duration", "input_size", "markup", "output_size", "phase")
+
+    def __init__(
+        self,
+        markup: str,
+        phase: str,
+        duration: float,
+        input_size: int | None,
+        output_size: int | None,
+    ):
+        #: :attr:`~markups.abstract.AbstractMarkup.name` of the markup
+        self.markup = markup
+        #: name of the phase, ``convert`` for the whole conversion
+        self.phase = phase
+        #: duration of the phase, in seconds
+        self.duration = duration
+        #: size of the phase input in characters, if known
+        self.input_size = input_size
+        #: size of the phase output in characters, if known
+        self.output_size = output_size
+
+    def __repr__(self) -> str:
+        return (
+            f"PhaseRecord({self.markup!r}, {self.phase!r}, {self.duration!r}, "
+            f"{self.input_size!r}, {self.output_size!r})"
+        )
+
+
+class PhaseStats:
+    """Aggregated measurements of one phase of one markup, in the form
+    of a histogram of durations and counters of sizes."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        #: number of measurements in each bucket (not cumulative), with
+        #: an extra bucket for durations above the last bound
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        #: total duration, in seconds
+        self.duration_sum = 0.0
+        #: total input size, in characters
+        self.input_size_sum = 0
+        #: total output size, in characters
+        self.output_size_sum = 0
+
+    def add(self, record: PhaseRecord) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, record.duration)] += 1
+        self.count += 1
+        self.duration_sum += record.duration
+        self.input_size_sum += record.input_size or 0
+        self.output_size_sum += record.output_size or 0
+
+
+class Collector:
+    """Collects the measurements of conversions that run in the context
+    where the collector is active.
+
+    A collector is activated using the ``with`` statement. The context
+    is inherited by asyncio tasks and by the threads of
+    :class:`markups.aio.AsyncConverter`, but not by other threads or
+    by worker processes.
+
+    :param callback: function called with each :class:`PhaseRecord`,
+                     for example to feed it to an OpenTelemetry histogram
+    :param keep_records: whether to keep the records in :attr:`records`
+                         (when it is false, only the aggregated
+                         statistics are kept)
+    :param buckets: upper bounds of the histogram buckets, in seconds
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[PhaseRecord], Any] | None = None,
+        keep_records: bool = True,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.callback = callback
+        self.keep_records = keep_records
+        self.buckets = tuple(sorted(buckets))
+        #: list of :class:`PhaseRecord` objects, in the order in which
+        #: the phases finished
+        self.records: list[PhaseRecord] = []
+        #: dictionary mapping (markup name, phase) pairs to
+        #: :class:`PhaseStats` objects
+        self.stats: dict[tuple[str, str], PhaseStats] = {}
+        self._lock = threading.Lock()
+        self._tokens: list[contextvars.Token[Collector | None]] = []
+
+    def __enter__(self) -> Collector:
+        self._tokens.append(_current_collector.set(self))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        _current_collector.reset(self._tokens.pop())
+
+    def add(self, record: PhaseRecord) -> None:
+        """Adds a measurement. This is called by the markups."""
+        key = (record.markup, record.phase)
+        with self._lock:
+            if self.keep_records:
+                self.records.append(record)
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = PhaseStats(self.buckets)
+            stats.add(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def clear(self) -> None:
+        """Removes all records and statistics."""
+        with self._lock:
+            self.records.clear()
+            self.stats.clear()
+
+    def to_prometheus(self, prefix: str = "markups") -> str:
+        """Returns the statistics in the Prometheus text exposition format:
+        a ``<prefix>_phase_duration_seconds`` histogram, and
+        ``<prefix>_phase_input_characters_total`` and
+        ``<prefix>_phase_output_characters_total`` counters, all labeled
+        by markup and phase."""
+        with self._lock:
+            stats = sorted(self.stats.items())
+            buckets = self.buckets
+        lines = [
+            f"# HELP {prefix}_phase_duration_seconds Duration of conversion phases.",
+            f"# TYPE {prefix}_phase_duration_seconds histogram",
+        ]
+        for (markup, phase), phase_stats in stats:
+            labels = f'markup="{_escape(markup)}",phase="{_escape(phase)}"'
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), phase_stats.bucket_counts):
+                cumulative += count
+                lines.append(
+                    f'{prefix}_phase_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative}",
+                )
+            lines += [
+                f"{prefix}_phase_duration_seconds_sum{{{labels}}} "
+                f"{phase_stats.duration_sum!r}",
+                f"{prefix}_phase_duration_seconds_count{{{labels}}} "
+                f"{phase_stats.count}",
+            ]
+        for direction in ("input", "output"):
+            name = f"{prefix}_phase_{direction}_characters_total"
+            lines += [
+                f"# HELP {name} Total size of conversion phases {direction}.",
+                f"# TYPE {name} counter",
+            ]
+            for (markup, phase), phase_stats in stats:
+                labels = f'markup="{_escape(markup)}",phase="{_escape(phase)}"'
+                value = getattr(phase_stats, f"{direction}_size_sum")
+                lines.append(f"{name}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+class _Phase:
+    """Measures a phase, and reports it to the collector on exit."""
+
+    __slots__ = ("collector", "input_size", "markup", "output_size", "phase", "start")
+
+    def __init__(
+        self,
+        collector: Collector,
+        markup: str,
+        phase: str,
+        input_size: int | None,
+    ):
+        self.collector = collector
+        self.markup = markup
+        self.phase = phase
+        self.input_size = input_size
+        self.output_size: int | None = None
+        self.start = 0.0
+
+    def __enter__(self) -> _Phase:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        duration = time.perf_counter() - self.start
+        record = PhaseRecord(
+            self.markup,
+            self.phase,
+            duration,
+            self.input_size,
+            self.output_size,
+        )
+        self.collector.add(record)
+
+    def set_output_size(self, size: int) -> None:
+        self.output_size = size
+
+
+class _NullPhase:
+    """Used instead of :class:`_Phase` when no collector is active."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NullPhase:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+    def set_output_size(self, size: int) -> None:
+        pass
+
+
+_null_phase = _NullPhase()
+
+
+def get_current_collector() -> Collector | None:
+    """:returns: the collector active in the current context, if any"""
+    return _current_collector.get()
+
+
+def phase(markup: str, name: str, input_size: int | None = None) -> _Phase | _NullPhase:
+    """Returns a context manager that measures a phase of a conversion.
+
+    Markup implementations use it like this::
+
+        with instrumentation.phase(self.name, "render", len(text)) as p:
+            html = render(text)
+            p.set_output_size(len(html))
+
+    :param markup: name of the markup
+    :param name: name of the phase
+    :param input_size: size of the phase input, in characters
+    """
+    collector = _current_collector.get()
+    if collector is None:
+        return _null_phase
+    return _Phase(collector, markup, name, input_size)
@@ -4,22 +4,23 @@
 
 from __future__ import annotations
 
+import functools
 import importlib
+import importlib.util
 import os
 import re
+import threading
 import warnings
+from collections import OrderedDict
 from collections.abc import Iterable, Iterator
 from typing import Any
 
 import markups.common as common
+import markups.instrumentation as instrumentation
 from markups.abstract import AbstractMarkup, ConvertedMarkup
 
-try:
-    import yaml
-
-    HAVE_YAML = True
-except ImportError:
-    HAVE_YAML = False
+# PyYAML is imported only when a YAML extensions file is actually found.
+HAVE_YAML = importlib.util.find_spec("yaml") is not None
 
 MATHJAX2_CONFIG = """<script type="text/x-mathjax-config">
 MathJax.Hub.Config({
@@ -60,11 +61,82 @@ MathJax = {
 
 extensions_re = re.compile(r"required.extensions: (.+)", flags=re.IGNORECASE)
 extension_name_re = re.compile(r"[a-z0-9_.]+(?:\([^)]+\))?", flags=re.IGNORECASE)
-
-_canonicalized_ext_names: dict[str, str] = {}
+# Characters that str.splitlines() treats as line boundaries
+line_break_re = re.compile("[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+# Lines that make a document unsuitable for block-by-block rendering:
+# reference link, footnote and abbreviation definitions, and raw HTML blocks
+# (which may contain blank lines), except for single-line comments.
+incremental_unsafe_re = re.compile(
+    r"^ {0,3}(?:\*?\[[^\]]+\]:|<(?!!--.*-->\s*$))",
+    flags=re.MULTILINE,
+)
+# Lines that may continue the previous block even after a blank line:
+# indented lines, list items, definitions and block quotes.
+block_continuation_re = re.compile(r"\s|[*+-]\s|\d+[.)]\s|[:>]")
+# Definitions of the def_list extension. A term that follows a definition
+# after a blank line continues the same definition list.
+definition_re = re.compile(r" {0,3}:[ \t]")
+fence_re = re.compile(r" {0,3}(`{3,}|~{3,})")
+
+# Extensions whose output depends on the whole document.
+# The posmap extension needs line numbers relative to the whole document.
+_document_wide_extensions = {
+    "markdown.extensions.meta",
+    "markdown.extensions.toc",
+    "markups.mdx_posmap",
+}
+
+# Extension names that are handled by MarkdownMarkup itself, and the
+# modules they enable
+_virtual_extensions = {
+    "mathjax": "mdx_math",
+    "posmap": "markups.mdx_posmap",
+}
 
 _name_and_config = tuple[str, dict[str, Any]]
 
+# Parsed global extensions files: absolute path -> ((mtime, size), extensions),
+# where extensions is None if the file could not be parsed
+_extensions_files: dict[
+    str,
+    tuple[tuple[int, int], tuple[_name_and_config, ...] | None],
+] = {}
+_extensions_files_lock = threading.Lock()
+#: number of times the global extensions files were actually read from disk
+#: (the parsed files are cached until they are modified)
+extensions_files_reads = 0
+
+# Module names of extensions, or None for extensions that were not found
+_canonicalized_ext_names: dict[str, str | None] = {}
+_canonicalized_ext_names_lock = threading.Lock()
+
+
+def _make_hashable(value: Any) -> Any:
+    """Converts nested dicts and lists (as found in extension configs)
+    to a hashable representation."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _make_hashable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_hashable(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class _ThreadState(threading.local):
+    """Per-thread state of a MarkdownMarkup instance."""
+
+    md: Any
+    extensions: set[str]
+    extension_configs: dict[str, dict[str, Any]]
+    engine_key: tuple[Any, ...]
+
+    def __init__(self) -> None:
+        self.engine_cache: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+
 
 class MarkdownMarkup(AbstractMarkup):
     """Markup class for Markdown language.
@@ -72,6 +144,10 @@ class MarkdownMarkup(AbstractMarkup):
 
     :param extensions: list of extension names
     :type extensions: list
+    :param engine_cache_size: maximum number of Python-Markdown instances
+                              (one per distinct set of extensions) to keep
+                              for reuse across conversions
+    :type engine_cache_size: int
     """
 
     name = "Markdown"
@@ -94,6 +170,18 @@ class MarkdownMarkup(AbstractMarkup):
             return False
         return getattr(markdown, "__version_info__", (2,)) >= (3,)
 
+    @staticmethod
+    def get_backend_version() -> str:
+        import markdown
+
+        return str(markdown.__version__)
+
+    def get_options(self) -> dict[str, Any]:
+        return {
+            "extensions": self.requested_extensions,
+            "global_extensions": self.global_extensions,
+        }
+
     def _load_extensions_list_from_txt_file(
         self,
         filename: str,
@@ -107,6 +195,8 @@ class MarkdownMarkup(AbstractMarkup):
         self,
         filename: str,
     ) -> Iterator[_name_and_config]:
+        import yaml
+
         with open(filename) as extensions_file:
             try:
                 data = yaml.safe_load(extensions_file)
@@ -134,24 +224,61 @@ class MarkdownMarkup(AbstractMarkup):
         for choice in choices:
             if choice.endswith(".yaml") and not HAVE_YAML:
                 continue
-            try:
-                if choice.endswith(".txt"):
-                    yield from self._load_extensions_list_from_txt_file(choice)
-                else:
-                    yield from self._load_extensions_list_from_yaml_file(choice)
-            except OSError:
+            extensions = self._read_extensions_file(choice)
+            if extensions is None:
                 continue  # Cannot open file, move to the next choice
+            # File loaded successfully, skip the remaining choices.
+            # Copy the configs, as the cached ones are shared.
+            for name, config in extensions:
+                yield name, config.copy()
+            break
+
+    def _read_extensions_file(
+        self,
+        filename: str,
+    ) -> tuple[_name_and_config, ...] | None:
+        """Returns the extensions listed in a global extensions file,
+        or ``None`` if the file cannot be read.
+
+        The result is cached until the modification time or the size
+        of the file changes.
+        """
+        global extensions_files_reads
+        path = os.path.abspath(filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _extensions_files.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        extensions: tuple[_name_and_config, ...] | None
+        try:
+            if path.endswith(".txt"):
+                extensions = tuple(self._load_extensions_list_from_txt_file(path))
             else:
-                break  # File loaded successfully, skip the remaining choices
+                extensions = tuple(self._load_extensions_list_from_yaml_file(path))
+        except OSError:
+            extensions = None
+        with _extensions_files_lock:
+            extensions_files_reads += 1
+            _extensions_files[path] = (stamp, extensions)
+        return extensions
 
     def _get_document_extensions(self, text: str) -> Iterator[_name_and_config]:
-        lines = text.splitlines()
-        match = extensions_re.search(lines[0]) if lines else None
-        if match:
-            extensions = extension_name_re.findall(match.group(1))
-            yield from self._split_extensions_configs(extensions)
-
-    def _canonicalize_extension_name(self, extension_name: str) -> str | None:
+        line_break = line_break_re.search(text)
+        first_line = text[: line_break.start()] if line_break else text
+        if len(first_line) > 1000:
+            # Do not keep long lines in the cache
+            yield from _get_extensions_from_line.__wrapped__(first_line)
+            return
+        # Copy the configs, as the cached ones are shared.
+        for name, config in _get_extensions_from_line(first_line):
+            yield name, config.copy()
+
+    @classmethod
+    def _canonicalize_extension_name(cls, extension_name: str) -> str | None:
         prefixes = ("markdown.extensions.", "", "mdx_")
         for prefix in prefixes:
             try:
@@ -164,7 +291,8 @@ class MarkdownMarkup(AbstractMarkup):
                 return prefix + extension_name
         return None
 
-    def _split_extension_config(self, extension_name: str) -> _name_and_config:
+    @staticmethod
+    def _split_extension_config(extension_name: str) -> _name_and_config:
         """Splits the configuration options from the extension name."""
         lb = extension_name.find("(")
         if lb == -1:
@@ -200,43 +328,145 @@ class MarkdownMarkup(AbstractMarkup):
             if name == "mathjax":
                 mathjax_config = {"enable_dollar_delimiter": True}
                 extension_configs["mdx_math"] = mathjax_config
+            elif name == "posmap":
+                extension_names.add("markups.mdx_posmap")
             elif name == "remove_extra":
                 if "markdown.extensions.extra" in extension_names:
                     extension_names.remove("markdown.extensions.extra")
                 if "mdx_math" in extension_names:
                     extension_names.remove("mdx_math")
             else:
-                if name in _canonicalized_ext_names:
-                    canonical_name = _canonicalized_ext_names[name]
-                else:
-                    candidate = self._canonicalize_extension_name(name)
-                    if candidate is None:
-                        warnings.warn(
-                            f'Extension "{name}" does not exist.',
-                            ImportWarning,
-                        )
-                        continue
-                    canonical_name = candidate
-                    _canonicalized_ext_names[name] = canonical_name
+                canonical_name = self._get_canonical_extension_name(name)
+                if canonical_name is None:
+                    warnings.warn(
+                        f'Extension "{name}" does not exist.',
+                        ImportWarning,
+                    )
+                    continue
                 extension_names.add(canonical_name)
                 extension_configs[canonical_name] = config
-        self.md = self.markdown.Markdown(
+        key = (tuple(sorted(extension_names)), _make_hashable(extension_configs))
+        state = self._state
+        state.md = self._get_engine(key, extension_names, extension_configs)
+        state.extensions = extension_names
+        state.extension_configs = extension_configs
+        state.engine_key = key
+
+    @classmethod
+    def _get_canonical_extension_name(cls, extension_name: str) -> str | None:
+        try:
+            return _canonicalized_ext_names[extension_name]
+        except KeyError:
+            pass
+        with _canonicalized_ext_names_lock:
+            if extension_name not in _canonicalized_ext_names:
+                canonical_name = cls._canonicalize_extension_name(extension_name)
+                _canonicalized_ext_names[extension_name] = canonical_name
+            return _canonicalized_ext_names[extension_name]
+
+    @classmethod
+    def preload_extensions(
+        cls,
+        extension_names: Iterable[str],
+    ) -> dict[str, str | None]:
+        """Finds and imports the modules of the given extensions, so that
+        markups using them do not need to do that on first conversion.
+
+        Pre-fork servers can call this in the parent process, so that all
+        worker processes start with the modules imported. The results of
+        the lookups are cached for the lifetime of the process, including
+        the failed ones (markups using such extensions still warn that
+        they do not exist).
+
+        :param extension_names: extension names, in any form accepted by
+                                the constructor (options are ignored)
+        :returns: dictionary mapping the extension names (without options)
+                  to module names, or to ``None`` for extensions that were
+                  not found
+        """
+        result: dict[str, str | None] = {}
+        for extension in extension_names:
+            name, _ = cls._split_extension_config(extension)
+            canonical_name: str | None
+            if name in _virtual_extensions:
+                canonical_name = _virtual_extensions[name]
+                try:
+                    importlib.import_module(canonical_name)
+                except ImportError:
+                    canonical_name = None
+            elif name == "remove_extra":
+                continue
+            else:
+                canonical_name = cls._get_canonical_extension_name(name)
+            result[name] = canonical_name
+        return result
+
+    def _get_engine(
+        self,
+        key: tuple[Any, ...],
+        extension_names: set[str],
+        extension_configs: dict[str, dict[str, Any]],
+    ) -> Any:
+        """Returns a Markdown instance for the given extensions, reusing
+        a cached one (created by the current thread) when possible."""
+        engine_cache = self._state.engine_cache
+        md = engine_cache.get(key)
+        if md is not None:
+            engine_cache.move_to_end(key)
+            with self._counters_lock:
+                self.engine_cache_hits += 1
+            md.reset()
+            return md
+        with self._counters_lock:
+            self.engine_cache_misses += 1
+        md = self.markdown.Markdown(
             extensions=sorted(extension_names),
             extension_configs=extension_configs,
             output_format="html5",
         )
-        self.extensions = extension_names
-        self.extension_configs = extension_configs
+        if self.engine_cache_size > 0:
+            engine_cache[key] = md
+            while len(engine_cache) > self.engine_cache_size:
+                engine_cache.popitem(last=False)
+        return md
+
+    def _get_state(self) -> _ThreadState:
+        state = self._state
+        if not hasattr(state, "md"):
+            # This instance is used by a new thread
+            self._apply_extensions()
+        return state
+
+    @property
+    def md(self) -> Any:
+        """The Python-Markdown instance last used by the current thread."""
+        return self._get_state().md
+
+    @property
+    def extensions(self) -> set[str]:
+        """Names of extensions last used by the current thread."""
+        return self._get_state().extensions
+
+    @property
+    def extension_configs(self) -> dict[str, dict[str, Any]]:
+        """Configs of extensions last used by the current thread."""
+        return self._get_state().extension_configs
 
     def __init__(
         self,
         filename: str | None = None,
         extensions: list[str] | None = None,
+        engine_cache_size: int = 8,
     ):
         AbstractMarkup.__init__(self, filename)
         import markdown
 
         self.markdown = markdown
+        self.engine_cache_size = engine_cache_size
+        self.engine_cache_hits = 0
+        self.engine_cache_misses = 0
+        self._counters_lock = threading.Lock()
+        self._state = _ThreadState()
         self.requested_extensions = extensions or []
         self.global_extensions: list[_name_and_config] = []
         if extensions is None:
@@ -244,11 +474,84 @@ class MarkdownMarkup(AbstractMarkup):
         self._apply_extensions()
 
     def convert(self, text: str) -> ConvertedMarkdown:
-        # Determine body
-        self.md.reset()
-        self._apply_extensions(self._get_document_extensions(text))
-        body = self.md.convert(text) + "\n"
+        with instrumentation.phase(self.name, "convert", len(text)) as convert_phase:
+            with instrumentation.phase(self.name, "extensions"):
+                self._apply_extensions(self._get_document_extensions(text))
+
+            # Determine body
+            with instrumentation.phase(self.name, "render", len(text)) as phase:
+                body = self.md.convert(text) + "\n"
+                phase.set_output_size(len(body))
 
+            convert_phase.set_output_size(len(body))
+            return self._create_converted(body)
+
+    def convert_incremental(
+        self,
+        previous_result: ConvertedMarkdown | None,
+        text: str,
+    ) -> ConvertedMarkdown:
+        """Converts `text` reusing the HTML of unchanged top-level blocks
+        from `previous_result` (which should be a result of a previous call
+        of this method).
+
+        Documents that use reference links, footnotes, abbreviations,
+        raw HTML blocks, or the ``meta`` and ``toc`` extensions cannot be
+        split into independent blocks, so they are always converted in full.
+        Otherwise, the result matches the one of :meth:`convert`, except that
+        whitespace between blocks may differ.
+
+        :returns: a ConvertedMarkdown instance, same as :meth:`convert`
+        """
+        with instrumentation.phase(
+            self.name,
+            "convert_incremental",
+            len(text),
+        ) as convert_phase:
+            converted = self._convert_incremental(previous_result, text)
+            convert_phase.set_output_size(len(converted.body))
+        return converted
+
+    def _convert_incremental(
+        self,
+        previous_result: ConvertedMarkdown | None,
+        text: str,
+    ) -> ConvertedMarkdown:
+        with instrumentation.phase(self.name, "extensions"):
+            self._apply_extensions(self._get_document_extensions(text))
+        blocks = None
+        if not self.extensions & _document_wide_extensions:
+            blocks = _split_blocks(text)
+        if blocks is None:
+            with instrumentation.phase(self.name, "render", len(text)) as phase:
+                body = self.md.convert(text) + "\n"
+                phase.set_output_size(len(body))
+            return self._create_converted(body)
+
+        cached_fragments = {}
+        if (
+            previous_result is not None
+            and previous_result.fragments is not None
+            and previous_result.extensions_key == self._state.engine_key
+        ):
+            cached_fragments = dict(previous_result.fragments)
+        fragments = []
+        for block in blocks:
+            html = cached_fragments.get(block)
+            if html is None:
+                with instrumentation.phase(self.name, "render", len(block)) as phase:
+                    self.md.reset()
+                    html = self.md.convert(block)
+                    phase.set_output_size(len(html))
+            fragments.append((block, html))
+        body = "\n".join(html for block, html in fragments if html) + "\n"
+
+        converted = self._create_converted(body)
+        converted.fragments = fragments
+        converted.extensions_key = self._state.engine_key
+        return converted
+
+    def _create_converted(self, body: str) -> ConvertedMarkdown:
         # Determine title
         if hasattr(self.md, "Meta") and "title" in self.md.Meta:
             title = str.join(" ", self.md.Meta["title"])
@@ -261,18 +564,89 @@ class MarkdownMarkup(AbstractMarkup):
         if "markdown.extensions.codehilite" in self.extensions:
             config = self.extension_configs.get("markdown.extensions.codehilite", {})
             css_class = config.get("css_class", "codehilite")
-            stylesheet = common.get_pygments_stylesheet(f".{css_class}")
         elif "pymdownx.highlight" in self.extensions:
             config = self.extension_configs.get("pymdownx.highlight", {})
             css_class = config.get("css_class", "highlight")
-            stylesheet = common.get_pygments_stylesheet(f".{css_class}")
-        else:
+
+        if css_class is None:
             stylesheet = ""
+        else:
+            with instrumentation.phase(self.name, "stylesheet") as phase:
+                stylesheet = common.get_pygments_stylesheet(f".{css_class}")
+                phase.set_output_size(len(stylesheet))
+
+        converted = ConvertedMarkdown(body, title, stylesheet)
+        if "markups.mdx_posmap" in self.extensions:
+            converted._position_index = self.md.posmap_index
+        return converted
+
+
+def clear_extensions_files_cache() -> None:
+    """Makes :class:`MarkdownMarkup` read the global extensions files again,
+    even if they have not been modified (they are cached otherwise)."""
+    with _extensions_files_lock:
+        _extensions_files.clear()
+
+
+@functools.lru_cache(maxsize=64)
+def _get_extensions_from_line(line: str) -> tuple[_name_and_config, ...]:
+    """Parses the ``Required-Extensions`` directive in a document's first line."""
+    match = extensions_re.search(line)
+    if not match:
+        return ()
+    extensions = extension_name_re.findall(match.group(1))
+    return tuple(map(MarkdownMarkup._split_extension_config, extensions))
 
-        return ConvertedMarkdown(body, title, stylesheet)
+
+def _split_blocks(text: str) -> list[str] | None:
+    """Splits a Markdown document into top-level blocks that can be
+    converted independently of each other.
+
+    :returns: list of blocks, or ``None`` if the document cannot be split
+    """
+    if incremental_unsafe_re.search(text):
+        return None
+    lines = text.split("\n")
+    blocks = []
+    start = 0
+    fence = None
+    previous_blank = False
+    previous_definition = False
+    for index, line in enumerate(lines):
+        if fence is not None:
+            match = fence_re.match(line)
+            if (
+                match
+                and match.group(1).startswith(fence)
+                and not line[match.end() :].strip()
+            ):
+                fence = None
+            continue
+        if not line.strip():
+            previous_blank = True
+            continue
+        if previous_blank and not block_continuation_re.match(line):
+            if not previous_definition:
+                blocks.append("\n".join(lines[start:index]))
+                start = index
+            previous_definition = False
+        if definition_re.match(line):
+            previous_definition = True
+        previous_blank = False
+        match = fence_re.match(line)
+        if match:
+            fence = match.group(1)
+    blocks.append("\n".join(lines[start:]))
+    return blocks
 
 
 class ConvertedMarkdown(ConvertedMarkup):
+    #: list of (source, HTML) pairs for top-level blocks, if the document
+    #: was converted with :meth:`MarkdownMarkup.convert_incremental`
+    fragments: list[tuple[str, str]] | None = None
+    #: identifies the set of extensions that produced the fragments
+    extensions_key: tuple[Any, ...] | None = None
+
     def get_javascript(self, webenv: bool = False) -> str:
         if '<script type="math/' not in self.body:
             return ""
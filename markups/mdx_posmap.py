@@ -0,0 +1,228 @@
+# This file is part of python-markups module
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+"""Python-Markdown extension that adds ``data-posmap`` attributes with
+source line numbers to the top-level block elements, like the
+reStructuredText markup does.
+
+The position index of the last converted document (see
+:meth:`markups.abstract.ConvertedMarkup.get_position_index`) is stored
+in the ``posmap_index`` attribute of the Markdown instance.
+
+It is enabled in :class:`~markups.MarkdownMarkup` by the ``posmap``
+extension name.
+"""
+
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as etree
+from array import array
+from typing import Any
+
+from markdown.blockprocessors import BlockProcessor
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+from markdown.preprocessors import Preprocessor
+from markdown.treeprocessors import Treeprocessor
+from markdown.util import HTML_PLACEHOLDER_RE
+
+from markups.abstract import LINE_MARKER, take_line_markers
+from markups.markdown import block_continuation_re, definition_re
+
+# The STX and ETX characters are removed from the source by Python-Markdown
+# before the preprocessor runs, so these markers cannot clash with the text.
+POSMAP_MARKER = "\x02posmap:%d\x03"
+POSMAP_MARKER_RE = re.compile("\x02posmap:([0-9]+)\x03")
+# A marker that is not replaced with a placeholder element, together
+# with the blank line after it
+LEFTOVER_MARKER_RE = re.compile("\x02posmap:[0-9]+\x03(?:\n\n)?")
+POSMAP_TAG = "markups-posmap"
+start_tag_re = re.compile(r"<([a-zA-Z][a-zA-Z0-9-]*)(?=[\s/>])")
+code_block_re = re.compile(r"(?: {4}|\t)\S")
+footnote_re = re.compile(r" {0,3}\[\^[^\]]+\]:")
+# Kinds of blocks which continue in the following indented blocks
+indented_continuation_kinds = {"list", "definition", "footnote"}
+
+
+class PosMapMarkPreprocessor(Preprocessor):
+    """Inserts a marker block with the line number before every top-level
+    block of the document."""
+
+    def run(self, lines: list[str]) -> list[str]:
+        # List items, block quotes and definition lists are merged with the
+        # following blocks of the same kind, so a marker must not be
+        # inserted between them.
+        blocks: list[tuple[int, str | None]] = []  # (line index, kind)
+        fenced_lines = self._get_fenced_lines(lines)
+        previous_blank = True
+        for index, line in enumerate(lines):
+            if index in fenced_lines:
+                previous_blank = False
+            elif not line.strip():
+                previous_blank = True
+            else:
+                if previous_blank and not line[0].isspace() and line[0] != ":":
+                    blocks.append((index, self._get_block_kind(line)))
+                elif (
+                    previous_blank
+                    and code_block_re.match(line)
+                    and not (blocks and blocks[-1][1] in indented_continuation_kinds)
+                ):
+                    # Indented code block, which is merged with the following
+                    # indented code blocks
+                    blocks.append((index, "code"))
+                elif blocks and definition_re.match(line):
+                    blocks[-1] = (blocks[-1][0], "definition")
+                previous_blank = False
+
+        # The meta extension needs the metadata to be at the very beginning.
+        skip_first_block = "meta" in self.md.preprocessors
+        result = []
+        start = 0
+        previous_kind = None
+        for index, kind in blocks:
+            if skip_first_block:
+                skip_first_block = False
+            elif kind is None or kind != previous_kind:
+                result += lines[start:index]
+                result += (POSMAP_MARKER % (index + 1), "")
+                start = index
+            previous_kind = kind
+        result += lines[start:]
+        return result
+
+    def _get_fenced_lines(self, lines: list[str]) -> set[int]:
+        """Returns indices of lines inside fenced code blocks (except
+        for the opening fence lines), as found by the fenced_code extension."""
+        if "fenced_code_block" not in self.md.preprocessors:
+            return set()
+        from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+        text = "\n".join(lines)
+        fenced_lines: set[int] = set()
+        line_index = position = 0
+        for match in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text):
+            line_index += text.count("\n", position, match.start())
+            end_index = line_index + text.count("\n", match.start(), match.end())
+            fenced_lines.update(range(line_index + 1, end_index + 1))
+            line_index, position = end_index, match.end()
+        return fenced_lines
+
+    @staticmethod
+    def _get_block_kind(line: str) -> str | None:
+        if line.startswith(">"):
+            return "quote"
+        if footnote_re.match(line):
+            return "footnote"
+        if block_continuation_re.match(line):
+            return "list"
+        return None
+
+
+class PosMapBlockProcessor(BlockProcessor):
+    """Replaces marker blocks with placeholder elements."""
+
+    def test(self, parent: etree.Element, block: str) -> bool:
+        return POSMAP_MARKER_RE.match(block) is not None
+
+    def run(self, parent: etree.Element, blocks: list[str]) -> None:
+        block = blocks.pop(0)
+        match = POSMAP_MARKER_RE.match(block)
+        assert match is not None
+        placeholder = etree.SubElement(parent, POSMAP_TAG)
+        placeholder.set("line", match.group(1))
+        rest = block[match.end() :].lstrip("\n")
+        if rest:
+            blocks.insert(0, rest)
+
+
+class PosMapTreeprocessor(Treeprocessor):
+    """Moves the line numbers from the placeholder elements to the
+    elements that follow them."""
+
+    def run(self, root: etree.Element) -> None:
+        parents = [
+            parent for parent in root.iter() if parent.find(POSMAP_TAG) is not None
+        ]
+        for parent in parents:
+            children = list(parent)
+            for index, child in enumerate(children):
+                if child.tag != POSMAP_TAG:
+                    continue
+                if index + 1 < len(children):
+                    self._set_line(children[index + 1], child.get("line", ""))
+                if child.tail:
+                    if index > 0:
+                        previous = children[index - 1]
+                        previous.tail = (previous.tail or "") + child.tail
+                    else:
+                        parent.text = (parent.text or "") + child.tail
+                parent.remove(child)
+
+    def _set_line(self, element: etree.Element, line: str) -> None:
+        if element.tag == POSMAP_TAG:
+            return
+        # Paragraphs that will be replaced with raw HTML blocks (and fenced
+        # code blocks) by the raw_html postprocessor must stay bare <p> tags,
+        # so add the attribute to the stashed HTML instead.
+        match = None
+        if element.tag == "p" and len(element) == 0 and element.text:
+            match = HTML_PLACEHOLDER_RE.fullmatch(element.text.strip())
+        if match is None:
+            element.set("data-posmap", LINE_MARKER % int(line))
+            return
+        stash = self.md.htmlStash.rawHtmlBlocks
+        key = int(match.group(1))
+        html = stash[key] if key < len(stash) else None
+        if isinstance(html, str):
+            tag_match = start_tag_re.match(html)
+            if tag_match and self.md.is_block_level(tag_match.group(1)):
+                end = tag_match.end()
+                marker = LINE_MARKER % int(line)
+                stash[key] = f'{html[:end]} data-posmap="{marker}"{html[end:]}'
+
+
+class PosMapCleanPostprocessor(Postprocessor):
+    """Removes markers that ended up inside raw HTML blocks."""
+
+    def run(self, text: str) -> str:
+        return LEFTOVER_MARKER_RE.sub("", text)
+
+
+class PosMapIndexPostprocessor(Postprocessor):
+    """Replaces the attribute markers with line numbers, and builds the
+    position index."""
+
+    def run(self, text: str) -> str:
+        # Markdown.convert() strips the output after the postprocessors,
+        # so strip it here to get the final offsets.
+        html, index = take_line_markers(text.strip())
+        self.md.posmap_index = index  # type: ignore[attr-defined]
+        return html
+
+
+class PosMapExtension(Extension):
+    def extendMarkdown(self, md: Any) -> None:
+        md.registerExtension(self)
+        self.md = md
+        md.posmap_index = array("I")
+        # Run after normalize_whitespace, but before the preprocessors that
+        # remove lines (fenced code, raw HTML and metadata).
+        md.preprocessors.register(PosMapMarkPreprocessor(md), "posmap_mark", 29)
+        md.parser.blockprocessors.register(
+            PosMapBlockProcessor(md.parser),
+            "posmap",
+            110,
+        )
+        md.treeprocessors.register(PosMapTreeprocessor(md), "posmap", 35)
+        md.postprocessors.register(PosMapCleanPostprocessor(md), "posmap_clean", 5)
+        md.postprocessors.register(PosMapIndexPostprocessor(md), "posmap_index", 1)
+
+    def reset(self) -> None:
+        self.md.posmap_index = array("I")
+
+
+def makeExtension(**kwargs: Any) -> PosMapExtension:
+    return PosMapExtension(**kwargs)
@@ -4,22 +4,38 @@
 
 from __future__ import annotations
 
+import copy
+import functools
+import importlib
+import importlib.util
+import threading
 from typing import Any
 
 import markups.common as common
-from markups.abstract import AbstractMarkup, ConvertedMarkup
+import markups.instrumentation as instrumentation
+from markups.abstract import (
+    LINE_MARKER,
+    AbstractMarkup,
+    ConvertedMarkup,
+    take_line_markers,
+)
 
-try:
-    from docutils.core import publish_parts
-    from docutils.writers.html5_polyglot import HTMLTranslator, Writer
+# Docutils is imported only when the markup is instantiated.
+HAVE_DOCUTILS = importlib.util.find_spec("docutils") is not None
 
-    HAVE_DOCUTILS = True
-except ImportError:
-    HAVE_DOCUTILS = False
 
-if HAVE_DOCUTILS:
+def __getattr__(name: str) -> Any:
+    # The translator class is created on first access, as it needs Docutils
+    if name == "CustomHTMLTranslator":
+        return _get_translator_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    class CustomHTMLTranslator(HTMLTranslator):  # type: ignore
+
+@functools.cache
+def _get_translator_class() -> type:
+    from docutils.writers.html5_polyglot import HTMLTranslator
+
+    class CustomHTMLTranslator(HTMLTranslator):
         def starttag(  # type: ignore
             self,
             node,
@@ -29,9 +45,11 @@ if HAVE_DOCUTILS:
             **attributes,
         ):
             if getattr(node, "line", None) is not None:
-                attributes["data-posmap"] = node.line
+                attributes["data-posmap"] = LINE_MARKER % node.line
             return super().starttag(node, tagname, suffix, empty, **attributes)
 
+    return CustomHTMLTranslator
+
 
 class ReStructuredTextMarkup(AbstractMarkup):
     """Markup class for reStructuredText language.
@@ -56,14 +74,27 @@ class ReStructuredTextMarkup(AbstractMarkup):
 
     @staticmethod
     def available() -> bool:
-        return HAVE_DOCUTILS
+        try:
+            importlib.import_module("docutils.core")
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def get_backend_version() -> str:
+        import docutils
+
+        return docutils.__version__
+
+    def get_options(self) -> dict[str, Any]:
+        return {"settings_overrides": self.overrides}
 
     def __init__(
         self,
         filename: str | None = None,
         settings_overrides: dict[str, Any] | None = None,
     ):
-        self.overrides = settings_overrides or {}
+        self.overrides = dict(settings_overrides or {})
         self.overrides.update(
             {
                 "math_output": "MathJax " + common.MATHJAX_WEB_URL,
@@ -73,22 +104,86 @@ class ReStructuredTextMarkup(AbstractMarkup):
             },
         )
         AbstractMarkup.__init__(self, filename)
-        self.writer = Writer()
-        self.writer.translator_class = CustomHTMLTranslator
+        from docutils.writers.html5_polyglot import Writer
+
+        self.writer_class = Writer
+        self._local = threading.local()
+        self._settings: Any = None
+        # Copy of the overrides from which the settings were computed
+        self._settings_overrides: dict[str, Any] | None = None
+
+    @property
+    def writer(self) -> Any:
+        """The Docutils writer used by the current thread (writers keep
+        the state of the document being written, so they cannot be shared
+        between threads)."""
+        writer = getattr(self._local, "writer", None)
+        if writer is None:
+            writer = self._local.writer = self.writer_class()
+            writer.translator_class = _get_translator_class()
+        return writer
+
+    def _get_publisher(self) -> Any:
+        """Returns a Docutils publisher for a new document.
+
+        This does the same as :func:`docutils.core.publish_parts`, except
+        that the reader and the parser are reused by the current thread, and
+        the settings (which are expensive to compute) are computed only
+        when :attr:`overrides` change, and then copied for each document.
+        """
+        from docutils.core import Publisher
+        from docutils.io import StringInput, StringOutput
+        from docutils.utils import DependencyList
+
+        components = getattr(self._local, "components", None)
+        if components is None:
+            from docutils.parsers.rst import Parser
+            from docutils.readers.standalone import Reader
+
+            parser = Parser()
+            components = self._local.components = (Reader(parser), parser)
+        reader, parser = components
+        publisher = Publisher(
+            reader,
+            parser,
+            self.writer,
+            source_class=StringInput,
+            destination_class=StringOutput,
+        )
+        settings = self._settings
+        if settings is None or self.overrides != self._settings_overrides:
+            overrides = copy.deepcopy(self.overrides)
+            defaults = overrides.copy()
+            # Propagate exceptions, like publish_parts does
+            defaults.setdefault("traceback", True)
+            settings = publisher.get_settings(**defaults)
+            self._settings, self._settings_overrides = settings, overrides
+        settings = copy.copy(settings)
+        # The only mutable setting which is updated during conversion
+        settings.record_dependencies = DependencyList()
+        publisher.settings = settings
+        return publisher
 
     def convert(self, text: str) -> ConvertedReStructuredText:
-        parts = publish_parts(
-            text,
-            source_path=self.filename,
-            writer=self.writer,
-            settings_overrides=self.overrides,
-        )
+        with instrumentation.phase(self.name, "convert", len(text)) as convert_phase:
+            converted = self._convert(text)
+            convert_phase.set_output_size(len(converted.body))
+        return converted
+
+    def _convert(self, text: str) -> ConvertedReStructuredText:
+        with instrumentation.phase(self.name, "publish", len(text)) as phase:
+            publisher = self._get_publisher()
+            publisher.set_source(text, self.filename)
+            publisher.set_destination()
+            publisher.publish()
+            parts = publisher.writer.parts
+            phase.set_output_size(len(parts["whole"]))
 
         # Determine head
         head = parts["head"]
 
-        # Determine body
-        body = parts["html_body"]
+        # Determine body and position index
+        body, position_index = take_line_markers(parts["html_body"])
 
         # Determine title
         title = parts["title"]
@@ -102,9 +197,14 @@ class ReStructuredTextMarkup(AbstractMarkup):
             stylesheet = origstyle[
                 origstyle.find(stylestart) + 25 : origstyle.rfind("</style>")
             ]
-        stylesheet += common.get_pygments_stylesheet(".code")
-
-        return ConvertedReStructuredText(head, body, title, stylesheet)
+        with instrumentation.phase(self.name, "stylesheet") as phase:
+            pygments_stylesheet = common.get_pygments_stylesheet(".code")
+            phase.set_output_size(len(pygments_stylesheet))
+        stylesheet += pygments_stylesheet
+
+        converted = ConvertedReStructuredText(head, body, title, stylesheet)
+        converted._position_index = position_index
+        return converted
 
 
 class ConvertedReStructuredText(ConvertedMarkup):
@@ -5,6 +5,7 @@
 import importlib
 
 import markups.common as common
+import markups.instrumentation as instrumentation
 from markups.abstract import AbstractMarkup, ConvertedMarkup
 
 
@@ -31,6 +32,12 @@ class TextileMarkup(AbstractMarkup):
             return False
         return True
 
+    @staticmethod
+    def get_backend_version() -> str:
+        import textile
+
+        return str(textile.__version__)
+
     def __init__(self, filename: str | None = None):
         AbstractMarkup.__init__(self, filename)
         from textile import textile
@@ -38,4 +45,9 @@ class TextileMarkup(AbstractMarkup):
         self.textile = textile
 
     def convert(self, text: str) -> ConvertedMarkup:
-        return ConvertedMarkup(self.textile(text))
+        with instrumentation.phase(self.name, "convert", len(text)) as convert_phase:
+            with instrumentation.phase(self.name, "render", len(text)) as phase:
+                body = self.textile(text)
+                phase.set_output_size(len(body))
+            convert_phase.set_output_size(len(body))
+        return ConvertedMarkup(body)
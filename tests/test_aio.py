@@ -0,0 +1,82 @@
+# This file is part of python-markups test suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import markups
+from markups.abstract import AbstractMarkup, ConvertedMarkup
+from markups.aio import AsyncConverter
+
+
+class SlowMarkup(AbstractMarkup):
+    name = "Slow"
+    file_extensions = (".slow",)
+
+    def __init__(self, filename: str | None = None):
+        AbstractMarkup.__init__(self, filename)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def convert(self, text: str) -> ConvertedMarkup:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(float(text))
+        with self.lock:
+            self.running -= 1
+        return ConvertedMarkup(f"<p>{text}</p>")
+
+
+class AsyncConverterTest(unittest.TestCase):
+    def test_aconvert(self) -> None:
+        markup = SlowMarkup()
+        converted = asyncio.run(markup.aconvert("0"))
+        self.assertEqual(converted.get_document_body(), "<p>0</p>")
+
+    def test_timeout(self) -> None:
+        markup = SlowMarkup()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(markup.aconvert("0.5", timeout=0.05))
+
+    def test_backpressure(self) -> None:
+        markup = SlowMarkup()
+        converter = AsyncConverter(ThreadPoolExecutor(8), max_pending=2)
+
+        async def convert_all() -> list[ConvertedMarkup]:
+            coroutines = [
+                markup.aconvert("0.02", converter=converter) for _ in range(10)
+            ]
+            return await asyncio.gather(*coroutines)
+
+        self.assertEqual(len(asyncio.run(convert_all())), 10)
+        self.assertEqual(markup.max_running, 2)
+
+
+@unittest.skipUnless(markups.TextileMarkup.available(), "Textile not available")
+class AsyncConvertManyTest(unittest.TestCase):
+    def test_aconvert_many(self) -> None:
+        items = [(f"file{i}.textile", f"Document *{i}*") for i in range(20)]
+        items.append(("unknown.txt", "Unknown markup"))
+
+        async def convert_all() -> dict[str, ConvertedMarkup | None]:
+            converter = AsyncConverter(max_pending=4)
+            return {
+                filename: converted
+                async for filename, converted in markups.aconvert_many(
+                    items,
+                    converter=converter,
+                )
+            }
+
+        results = asyncio.run(convert_all())
+        self.assertEqual(len(results), 21)
+        self.assertIsNone(results["unknown.txt"])
+        converted = results["file5.textile"]
+        assert converted is not None
+        self.assertIn("<strong>5</strong>", converted.get_document_body())
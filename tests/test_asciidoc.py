@@ -7,10 +7,7 @@ import unittest
 from markups.asciidoc import AsciiDocMarkup
 
 
-@unittest.skipUnless(
-    AsciiDocMarkup.available(),
-    "asciidoc.py and/or lxml not available",
-)
+@unittest.skipUnless(AsciiDocMarkup.available(), "asciidoc.py not available")
 class AsciiDocTextTest(unittest.TestCase):
     def test_basic(self) -> None:
         self.maxDiff = None
@@ -33,6 +30,24 @@ class AsciiDocTextTest(unittest.TestCase):
             converted = markup.convert(INVALID_SYNTAX)
         self.assertIn("Foo", converted.get_document_body())
 
+    def test_special_characters_in_title(self) -> None:
+        markup = AsciiDocMarkup()
+        converted = markup.convert("= Tom & <Jerry>\n\nText.\n")
+        self.assertEqual(converted.get_document_title(), "Tom & <Jerry>")
+        self.assertIn("<h1>Tom &amp; &lt;Jerry&gt;</h1>", converted.get_document_body())
+        self.assertNotIn("</body>", converted.get_document_body())
+        self.assertTrue(converted.get_javascript().startswith("<script"))
+
+    def test_static_resources_shared(self) -> None:
+        markup = AsciiDocMarkup()
+        first = markup.convert("= First\n\nText.\n")
+        second = markup.convert("= Second\n\nOther text.\n")
+        self.assertIs(first.get_stylesheet(), second.get_stylesheet())
+        self.assertIs(first.get_javascript(), second.get_javascript())
+        with_math = markup.convert("= Math\n:asciimath:\n\nasciimath:[x]\n")
+        self.assertNotEqual(with_math.get_javascript(), first.get_javascript())
+        self.assertIn("ASCIIMathML", with_math.get_javascript())
+
     def test_unicode(self) -> None:
         markup = AsciiDocMarkup()
         converted = markup.convert("Тест")
@@ -0,0 +1,50 @@
+# This file is part of python-markups test suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from markups import TextileMarkup
+from markups.buildcache import BuildManifest, get_fingerprint
+
+
+@unittest.skipUnless(TextileMarkup.available(), "Textile not available")
+class BuildManifestTest(unittest.TestCase):
+    def test_manifest(self) -> None:
+        markup = TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            manifest_path = join(tmpdirname, "manifest.json")
+            output_path = join(tmpdirname, "output.html")
+            fingerprint = get_fingerprint(markup, "h1. Hello", webenv=False)
+            manifest = BuildManifest(manifest_path)
+            self.assertFalse(
+                manifest.is_up_to_date("input.textile", output_path, fingerprint),
+            )
+            manifest.update("input.textile", output_path, fingerprint)
+            manifest.save()
+            with open(output_path, "w") as output_file:
+                output_file.write("<h1>Hello</h1>")
+
+            manifest = BuildManifest(manifest_path)
+            self.assertTrue(
+                manifest.is_up_to_date("input.textile", output_path, fingerprint),
+            )
+            fingerprint = get_fingerprint(markup, "h1. Hello", webenv=True)
+            self.assertFalse(
+                manifest.is_up_to_date("input.textile", output_path, fingerprint),
+            )
+            with mock.patch("markups.common.PYGMENTS_STYLE", "colorful"):
+                fingerprint = get_fingerprint(markup, "h1. Hello", webenv=False)
+            self.assertFalse(
+                manifest.is_up_to_date("input.textile", output_path, fingerprint),
+            )
+
+    def test_invalid_manifest(self) -> None:
+        with TemporaryDirectory() as tmpdirname:
+            manifest_path = join(tmpdirname, "manifest.json")
+            with open(manifest_path, "w") as manifest_file:
+                manifest_file.write("{invalid")
+            self.assertEqual(BuildManifest(manifest_path).entries, {})
@@ -0,0 +1,129 @@
+# This file is part of python-markups test suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from markups import MarkdownMarkup, TextileMarkup
+from markups.abstract import ConvertedMarkup
+from markups.diskcache import DiskCache
+from markups.markdown import ConvertedMarkdown
+
+
+def convert_in_process(path: str, number: int) -> str:
+    cache = DiskCache(path)
+    converted = cache.convert(TextileMarkup(), f"h1. Document {number % 5}")
+    return converted.get_document_body()
+
+
+@unittest.skipUnless(TextileMarkup.available(), "Textile not available")
+class DiskCacheTest(unittest.TestCase):
+    def test_convert(self) -> None:
+        markup = TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            cache = DiskCache(join(tmpdirname, "cache.db"))
+            with mock.patch.object(markup, "convert", wraps=markup.convert) as convert:
+                first = cache.convert(markup, "h1. Hello")
+                second = cache.convert(markup, "h1. Hello")
+                convert.assert_called_once_with("h1. Hello")
+            self.assertEqual(first.get_document_body(), second.get_document_body())
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # Another instance (for example, in another process)
+            cache = DiskCache(join(tmpdirname, "cache.db"))
+            self.assertIsNotNone(cache.get(markup, "h1. Hello"))
+            self.assertIsNone(cache.get(markup, "h1. Goodbye"))
+            cache.clear()
+            self.assertIsNone(cache.get(markup, "h1. Hello"))
+
+    def test_key(self) -> None:
+        key = DiskCache.get_key(TextileMarkup(), "h1. Hello")
+        self.assertNotEqual(key, DiskCache.get_key(TextileMarkup(), "h1. Hello!"))
+        with mock.patch.object(TextileMarkup, "get_backend_version", return_value="0"):
+            self.assertNotEqual(key, DiskCache.get_key(TextileMarkup(), "h1. Hello"))
+
+    def test_eviction(self) -> None:
+        markup = TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            cache = DiskCache(join(tmpdirname, "cache.db"), max_size=200)
+            for text in ("h1. One", "h1. Two", "h1. Three"):
+                cache.convert(markup, text)
+            cache.convert(markup, "h1. Two")
+            # Each entry is about 75 bytes, so the least recently
+            # used one must have been removed.
+            self.assertIsNone(cache.get(markup, "h1. One"))
+            self.assertIsNotNone(cache.get(markup, "h1. Two"))
+            self.assertIsNotNone(cache.get(markup, "h1. Three"))
+
+    def test_total_size(self) -> None:
+        markup = TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            cache = DiskCache(join(tmpdirname, "cache.db"), max_size=200)
+            for text in ("h1. One", "h1. Two", "h1. Three", "h1. Two"):
+                cache.put(markup, text, markup.convert(text))
+            connection = cache._get_connection()
+            total_size, entries_size = connection.execute(
+                "SELECT (SELECT size FROM total_size), (SELECT SUM(size) FROM entries)",
+            ).fetchone()
+            self.assertEqual(total_size, entries_size)
+            self.assertLessEqual(total_size, 200)
+            cache.clear()
+            self.assertEqual(
+                connection.execute("SELECT size FROM total_size").fetchone(),
+                (0,),
+            )
+
+    def test_untrusted_class(self) -> None:
+        class CustomConverted(ConvertedMarkup):
+            pass
+
+        markup = TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            cache = DiskCache(join(tmpdirname, "cache.db"))
+            cache.put(markup, "h1. Custom", CustomConverted("<h1>Custom</h1>"))
+            self.assertIsNone(cache.get(markup, "h1. Custom"))
+
+            # A tampered entry must not make the cache import anything
+            cache.put(markup, "h1. Hello", markup.convert("h1. Hello"))
+            with cache._get_connection() as connection:
+                connection.execute("UPDATE entries SET class = 'os:system'")
+            with mock.patch("importlib.import_module") as import_module:
+                self.assertIsNone(cache.get(markup, "h1. Hello"))
+            import_module.assert_not_called()
+
+    def test_processes(self) -> None:
+        with TemporaryDirectory() as tmpdirname:
+            path = join(tmpdirname, "cache.db")
+            with ProcessPoolExecutor(4) as executor:
+                bodies = list(executor.map(convert_in_process, [path] * 40, range(40)))
+            for number, body in enumerate(bodies):
+                self.assertEqual(body, f"\t<h1>Document {number % 5}</h1>")
+            cache = DiskCache(path)
+            self.assertIsNotNone(cache.get(TextileMarkup(), "h1. Document 0"))
+
+
+@unittest.skipUnless(MarkdownMarkup.available(), "Markdown not available")
+class DiskCacheMarkdownTest(unittest.TestCase):
+    def test_converted_class(self) -> None:
+        markup = MarkdownMarkup(extensions=["mdx_math"])
+        with TemporaryDirectory() as tmpdirname:
+            DiskCache(join(tmpdirname, "cache.db")).convert(markup, "$$x$$")
+            converted = DiskCache(join(tmpdirname, "cache.db")).get(markup, "$$x$$")
+        assert converted is not None
+        self.assertIsInstance(converted, ConvertedMarkdown)
+        self.assertIn("MathJax", converted.get_javascript(webenv=True))
+
+    def test_position_index(self) -> None:
+        markup = MarkdownMarkup(extensions=["posmap"])
+        converted = markup.convert("Text")
+        self.assertEqual(len(converted.get_position_index()), 2)
+        with TemporaryDirectory() as tmpdirname:
+            cache = DiskCache(join(tmpdirname, "cache.db"))
+            cache.put(markup, "Text", converted)
+            cached = cache.get(markup, "Text")
+        assert cached is not None
+        self.assertEqual(cached.get_position_index(), converted.get_position_index())
@@ -0,0 +1,118 @@
+# This file is part of python-markups test suite
+# License: 3-clause BSD, see LICENSE file
+# Copyright: (C) Dmitry Shachnev, 2026
+
+import asyncio
+import unittest
+
+from markups import MarkdownMarkup, ReStructuredTextMarkup, TextileMarkup
+from markups.aio import AsyncConverter
+from markups.instrumentation import (
+    Collector,
+    PhaseRecord,
+    get_current_collector,
+    phase,
+)
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_disabled(self) -> None:
+        self.assertIsNone(get_current_collector())
+        with phase("Markdown", "render", 10) as p:
+            p.set_output_size(20)
+        self.assertIs(phase("Markdown", "render"), phase("Textile", "convert"))
+
+    def test_nested_collectors(self) -> None:
+        outer = Collector()
+        inner = Collector()
+        with outer:
+            with inner:
+                self.assertIs(get_current_collector(), inner)
+                with phase("Markdown", "render"):
+                    pass
+            self.assertIs(get_current_collector(), outer)
+        self.assertIsNone(get_current_collector())
+        self.assertEqual(len(inner.records), 1)
+        self.assertEqual(outer.records, [])
+
+    def test_callback(self) -> None:
+        records: list[PhaseRecord] = []
+        with Collector(callback=records.append, keep_records=False) as collector:
+            with phase("Markdown", "render", 10) as p:
+                p.set_output_size(20)
+        self.assertEqual(collector.records, [])
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].markup, "Markdown")
+        self.assertEqual(records[0].phase, "render")
+        self.assertEqual((records[0].input_size, records[0].output_size), (10, 20))
+        stats = collector.stats["Markdown", "render"]
+        self.assertEqual((stats.count, stats.input_size_sum), (1, 10))
+
+    def test_prometheus(self) -> None:
+        collector = Collector(buckets=(0.5, 1.0))
+        for duration in (0.1, 0.7, 2.0):
+            collector.add(PhaseRecord("Markdown", "render", duration, 10, 30))
+        collector.add(PhaseRecord('"x"', "convert", 0.2, None, None))
+        lines = collector.to_prometheus().splitlines()
+        self.assertIn("# TYPE markups_phase_duration_seconds histogram", lines)
+        labels = 'markup="Markdown",phase="render"'
+        for line in (
+            f'markups_phase_duration_seconds_bucket{{{labels},le="0.5"}} 1',
+            f'markups_phase_duration_seconds_bucket{{{labels},le="1.0"}} 2',
+            f'markups_phase_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+            f"markups_phase_duration_seconds_count{{{labels}}} 3",
+            f"markups_phase_input_characters_total{{{labels}}} 30",
+            f"markups_phase_output_characters_total{{{labels}}} 90",
+        ):
+            self.assertIn(line, lines)
+        self.assertIn(
+            'markups_phase_duration_seconds_count{markup="\\"x\\"",phase="convert"} 1',
+            lines,
+        )
+        collector.clear()
+        self.assertEqual(collector.stats, {})
+
+    @unittest.skipUnless(TextileMarkup.available(), "Textile not available")
+    def test_textile(self) -> None:
+        with Collector() as collector:
+            converted = TextileMarkup().convert("h1. Hello")
+        self.assertEqual(
+            [(r.phase, r.input_size) for r in collector.records],
+            [("render", 9), ("convert", 9)],
+        )
+        self.assertEqual(collector.records[1].output_size, len(converted.body))
+
+    @unittest.skipUnless(MarkdownMarkup.available(), "Markdown not available")
+    def test_markdown(self) -> None:
+        markup = MarkdownMarkup(extensions=["codehilite"])
+        with Collector() as collector:
+            markup.convert("Hello")
+            markup.convert_incremental(None, "One\n\nTwo")
+        self.assertEqual(
+            [r.phase for r in collector.records],
+            ["extensions", "render", "stylesheet", "convert"]
+            + ["extensions", "render", "render", "stylesheet", "convert_incremental"],
+        )
+        self.assertEqual(collector.records[1].output_size, len("<p>Hello</p>\n"))
+
+    @unittest.skipUnless(ReStructuredTextMarkup.available(), "Docutils not available")
+    def test_restructuredtext(self) -> None:
+        with Collector() as collector:
+            ReStructuredTextMarkup().convert("Hello")
+        self.assertEqual(
+            [r.phase for r in collector.records],
+            ["publish", "stylesheet", "convert"],
+        )
+        self.assertTrue(all(r.duration >= 0 for r in collector.records))
+
+    @unittest.skipUnless(TextileMarkup.available(), "Textile not available")
+    def test_async_converter(self) -> None:
+        async def convert() -> None:
+            await AsyncConverter().convert(TextileMarkup(), "h1. Hello")
+
+        with Collector() as collector:
+            asyncio.run(convert())
+        self.assertEqual(
+            [r.phase for r in collector.records],
+            ["render", "convert"],
+        )
@@ -3,12 +3,22 @@
 # Copyright: (C) Dmitry Shachnev, 2012-2023
 
 import importlib
+import re
+import sys
 import unittest
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from os.path import join
 from tempfile import TemporaryDirectory
+from unittest import mock
 
-from markups.markdown import MarkdownMarkup, _canonicalized_ext_names
+import markups.markdown
+from markups.markdown import (
+    MarkdownMarkup,
+    _canonicalized_ext_names,
+    _get_extensions_from_line,
+    clear_extensions_files_cache,
+)
 
 try:
     import pymdownx
@@ -62,6 +72,53 @@ the family Rosaceae.</dd>
 </dl>
 """
 
+posmap_source = """\
+# Header
+
+Paragraph
+on two lines.
+
+<div>
+raw
+
+html
+</div>
+
+```python
+a = 1
+
+b = 2
+```
+
+* item 1
+
+* item 2
+"""
+
+posmap_output = """\
+<h1 data-posmap="1">Header</h1>
+<p data-posmap="3">Paragraph
+on two lines.</p>
+<div data-posmap="6">
+raw
+
+html
+</div>
+
+<pre data-posmap="12"><code class="language-python">a = 1
+
+b = 2
+</code></pre>
+<ul data-posmap="18">
+<li>
+<p>item 1</p>
+</li>
+<li>
+<p>item 2</p>
+</li>
+</ul>
+"""
+
 mathjax_header = "<!--- Type: markdown; Required extensions: mathjax --->\n\n"
 
 mathjax_source = r"""$i_1$ some text \$escaped\$ $i_2$
@@ -143,6 +200,30 @@ triple_backticks_in_list_source = """
 2. List item 2
 """
 
+incremental_source = """# Header
+
+Some *text*
+on two lines.
+
+1. List item 1
+
+    ```python
+    import this
+    ```
+
+2. List item 2
+
+```
+code
+
+with a blank line
+```
+
+> Block quote
+
+Last paragraph
+"""
+
 
 @unittest.skipUnless(MarkdownMarkup.available(), "Markdown not available")
 class MarkdownTest(unittest.TestCase):
@@ -170,6 +251,36 @@ class MarkdownTest(unittest.TestCase):
         self.assertEqual(name, "toc")
         self.assertEqual(parameters, {"anchorlink": "1", "foo": "bar"})
 
+    def test_preload_extensions(self) -> None:
+        result = MarkdownMarkup.preload_extensions(
+            ["toc(anchorlink=1)", "posmap", "remove_extra", "nonexistent_preload"],
+        )
+        self.assertEqual(
+            result,
+            {
+                "toc": "markdown.extensions.toc",
+                "posmap": "markups.mdx_posmap",
+                "nonexistent_preload": None,
+            },
+        )
+        self.assertIsNone(_canonicalized_ext_names["nonexistent_preload"])
+        with mock.patch.object(
+            MarkdownMarkup,
+            "_canonicalize_extension_name",
+        ) as canonicalize:
+            with self.assertWarnsRegex(
+                ImportWarning,
+                'Extension "nonexistent_preload" does not exist.',
+            ):
+                markup = MarkdownMarkup(extensions=["toc", "nonexistent_preload"])
+            canonicalize.assert_not_called()
+        self.assertIn("markdown.extensions.toc", markup.extensions)
+
+    def test_preload_missing_virtual_extension(self) -> None:
+        with mock.patch.dict(sys.modules, {"mdx_math": None}):
+            result = MarkdownMarkup.preload_extensions(["mathjax"])
+        self.assertEqual(result, {"mathjax": None})
+
     def test_loading_extensions_by_module_name(self) -> None:
         markup = MarkdownMarkup(extensions=["markdown.extensions.footnotes"])
         source = (
@@ -222,6 +333,29 @@ class MarkdownTest(unittest.TestCase):
             '<p><a class="wikilink" href="/Link/">Link</a></p>\n',
         )
 
+    def test_document_extensions_first_line(self) -> None:
+        markup = MarkdownMarkup(extensions=[])
+        for line_break in ("\n", "\r\n", "\r", "\u2028"):
+            text = f"Required-Extensions: toc(title=Contents){line_break}wikilinks"
+            self.assertEqual(
+                list(markup._get_document_extensions(text)),
+                [("toc", {"title": "Contents"})],
+            )
+        self.assertEqual(list(markup._get_document_extensions("")), [])
+        list(markup._get_document_extensions("Required-Extensions: toc\nfoo"))
+        hits = _get_extensions_from_line.cache_info().hits
+        list(markup._get_document_extensions("Required-Extensions: toc\nbar"))
+        self.assertEqual(_get_extensions_from_line.cache_info().hits, hits + 1)
+
+    def test_document_extensions_not_shared(self) -> None:
+        text = "Required-Extensions: toc(title=Contents)\n\n[TOC]\n\n# Header"
+        first = MarkdownMarkup(extensions=[])
+        first.convert(text)
+        first.extension_configs["markdown.extensions.toc"]["title"] = "Changed"
+        second = MarkdownMarkup(extensions=[])
+        html = second.convert(text).get_document_body()
+        self.assertIn('<span class="toctitle">Contents</span>', html)
+
     def test_document_extensions_change(self) -> None:
         """Extensions from document should be replaced on each run, not added."""
         markup = MarkdownMarkup(extensions=[])
@@ -234,6 +368,155 @@ class MarkdownTest(unittest.TestCase):
         html = markup.convert(toc_header + content).get_document_body()
         self.assertNotIn("<p>[TOC]</p>", html)
 
+    def test_engine_cache(self) -> None:
+        markup = MarkdownMarkup(extensions=[])
+        toc_header = "<!-- Required extensions: toc -->\n\n"
+        markup.convert("# Header")
+        markup.convert(toc_header + "# Header")
+        self.assertEqual(markup.engine_cache_misses, 2)
+        md = markup.md
+        html = markup.convert(toc_header + "# Other header").get_document_body()
+        self.assertIs(markup.md, md)
+        self.assertEqual(markup.engine_cache_hits, 2)
+        self.assertEqual(html, toc_header + '<h1 id="other-header">Other header</h1>\n')
+
+    def test_engine_cache_size(self) -> None:
+        markup = MarkdownMarkup(extensions=[], engine_cache_size=1)
+        markup.convert("<!-- Required extensions: toc -->\n")
+        markup.convert("<!-- Required extensions: sane_lists -->\n")
+        self.assertEqual(len(markup._state.engine_cache), 1)
+        markup.convert("<!-- Required extensions: toc -->\n")
+        self.assertEqual(markup.engine_cache_misses, 4)
+
+    def test_convert_incremental(self) -> None:
+        markup = MarkdownMarkup()
+        converted = markup.convert_incremental(None, incremental_source)
+        self.assertEqual(
+            converted.get_document_body(),
+            markup.convert(incremental_source).get_document_body(),
+        )
+        assert converted.fragments is not None
+        self.assertEqual(len(converted.fragments), 4)
+        new_source = incremental_source.replace("Last", "Final")
+        with mock.patch.object(markup.md, "convert", wraps=markup.md.convert) as m:
+            converted = markup.convert_incremental(converted, new_source)
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(
+            converted.get_document_body(),
+            markup.convert(new_source).get_document_body(),
+        )
+        # Terms after a blank line continue the definition list
+        source = "Term\n: Definition\n\nTerm2\n: Def2\n\nText\n\nMore text"
+        converted = markup.convert_incremental(None, source)
+        self.assertEqual(
+            converted.get_document_body(),
+            markup.convert(source).get_document_body(),
+        )
+        self.assertEqual(converted.body.count("<dl>"), 1)
+        assert converted.fragments is not None
+        self.assertEqual(len(converted.fragments), 2)
+
+    def test_convert_incremental_fallback(self) -> None:
+        markup = MarkdownMarkup()
+        source = "Some [link][1].\n\nOther paragraph.\n\n[1]: https://example.com\n"
+        converted = markup.convert_incremental(None, source)
+        self.assertIsNone(converted.fragments)
+        self.assertIn('<a href="https://example.com">link</a>', converted.body)
+        source = "Required-Extensions: meta\nTitle: Hello\n\nSome text."
+        converted = markup.convert_incremental(None, source)
+        self.assertIsNone(converted.fragments)
+        self.assertEqual(converted.get_document_title(), "Hello")
+        markup = MarkdownMarkup(extensions=["posmap"])
+        converted = markup.convert_incremental(None, "Some text.\n\nOther text.")
+        self.assertIsNone(converted.fragments)
+        self.assertIn('<p data-posmap="3">Other text.</p>', converted.body)
+
+    def test_posmap(self) -> None:
+        markup = MarkdownMarkup(extensions=["posmap"])
+        converted = markup.convert(posmap_source)
+        self.assertEqual(converted.get_document_body(), posmap_output)
+        # Without line numbers, the output is the same as without the extension
+        self.assertEqual(
+            re.sub(r' data-posmap="[0-9]+"', "", converted.get_document_body()),
+            MarkdownMarkup().convert(posmap_source).get_document_body(),
+        )
+        # Merged blocks and removed definitions are not broken by the markers
+        for source in (deflists_source, "> a\n\n> b\n", "a[^1]\n\n[^1]: b\n"):
+            converted = markup.convert(source)
+            self.assertEqual(
+                re.sub(r' data-posmap="[0-9]+"', "", converted.get_document_body()),
+                MarkdownMarkup().convert(source).get_document_body(),
+            )
+
+    def test_posmap_indented_code(self) -> None:
+        markup = MarkdownMarkup(extensions=["posmap"])
+        source = "Text\n\n    code\n\n    more code\n\n* Item\n\n    more item\n"
+        converted = markup.convert(source)
+        self.assertIn('<pre data-posmap="3"><code>code\n\nmore code\n', converted.body)
+        self.assertIn('<ul data-posmap="7">', converted.body)
+        self.assertEqual(
+            re.sub(r' data-posmap="[0-9]+"', "", converted.get_document_body()),
+            MarkdownMarkup().convert(source).get_document_body(),
+        )
+
+    def test_posmap_meta(self) -> None:
+        markup = MarkdownMarkup(extensions=["meta", "posmap"])
+        converted = markup.convert("Title: Hello\n\nSome text.\n")
+        self.assertEqual(converted.get_document_title(), "Hello")
+        self.assertEqual(
+            converted.get_document_body(),
+            '<p data-posmap="3">Some text.</p>\n',
+        )
+
+    def test_posmap_offsets(self) -> None:
+        markup = MarkdownMarkup(extensions=["posmap"])
+        converted = markup.convert(posmap_source)
+        body = converted.get_document_body()
+        self.assertIsNone(converted.get_offset_for_line(0))
+        self.assertEqual(converted.get_offset_for_line(1), 0)
+        self.assertEqual(converted.get_offset_for_line(2), 0)
+        offset = converted.get_offset_for_line(7)
+        assert offset is not None
+        self.assertTrue(body.startswith('<div data-posmap="6">', offset))
+        offset = converted.get_offset_for_line(100)
+        assert offset is not None
+        self.assertTrue(body.startswith('<ul data-posmap="18">', offset))
+        self.assertIsNone(MarkdownMarkup().convert("text").get_offset_for_line(1))
+
+    def test_posmap_raw_html(self) -> None:
+        source = '<div data-posmap="7">x</div>\n\nText'
+        converted = MarkdownMarkup().convert(source)
+        self.assertEqual(len(converted.get_position_index()), 0)
+        converted = MarkdownMarkup(extensions=["posmap"]).convert(source)
+        body = converted.get_document_body()
+        index = converted.get_position_index()
+        self.assertEqual(index[0::2].tolist(), [1, 3])
+        self.assertTrue(body.startswith('<div data-posmap="1" data-posmap="7">'))
+        self.assertEqual(index[1], 0)
+        self.assertTrue(body.startswith('<p data-posmap="3">', index[3]))
+
+    def test_threads(self) -> None:
+        markup = MarkdownMarkup()
+        sources = [
+            tables_source,
+            deflists_source,
+            mathjax_header + mathjax_source,
+            "Required-Extensions: meta\nTitle: Hello\n\n" + deflists_source,
+            "<!-- Required extensions: toc -->\n\n[TOC]\n\n# Header\n\n## Sub",
+            "Required-Extensions: remove_extra\n\n" + tables_source,
+        ] * 50
+        expected = [MarkdownMarkup().convert(source) for source in sources]
+
+        def convert(source: str) -> tuple[str, str]:
+            converted = markup.convert(source)
+            return converted.get_document_body(), converted.get_document_title()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(convert, sources))
+        for (body, title), converted in zip(results, expected):
+            self.assertEqual(body, converted.get_document_body())
+            self.assertEqual(title, converted.get_document_title())
+
     def test_extra(self) -> None:
         markup = MarkdownMarkup()
         html = markup.convert(tables_source).get_document_body()
@@ -326,6 +609,32 @@ class MarkdownTest(unittest.TestCase):
             [("foo", {}), ("baz", {"arg": "value"})],
         )
 
+    def test_extensions_files_cache(self) -> None:
+        with TemporaryDirectory() as tmpdirname:
+            txtfilename = join(tmpdirname, "markdown-extensions.txt")
+            with open(txtfilename, "w") as f:
+                f.write("foo\n")
+            reads = markups.markdown.extensions_files_reads
+            MarkdownMarkup(filename=join(tmpdirname, "foo.md"))
+            markup = MarkdownMarkup(filename=join(tmpdirname, "bar.md"))
+            self.assertEqual(markups.markdown.extensions_files_reads, reads + 1)
+            self.assertEqual(markup.global_extensions, [("foo", {})])
+
+            # The cached configs must not be shared between instances
+            markup.global_extensions[0][1]["arg"] = "value"
+            markup = MarkdownMarkup(filename=join(tmpdirname, "foo.md"))
+            self.assertEqual(markup.global_extensions, [("foo", {})])
+
+            with open(txtfilename, "w") as f:
+                f.write("foo\nbar\n")
+            markup = MarkdownMarkup(filename=join(tmpdirname, "foo.md"))
+            self.assertEqual(markups.markdown.extensions_files_reads, reads + 2)
+            self.assertEqual(markup.global_extensions, [("foo", {}), ("bar", {})])
+
+            clear_extensions_files_cache()
+            MarkdownMarkup(filename=join(tmpdirname, "foo.md"))
+            self.assertEqual(markups.markdown.extensions_files_reads, reads + 3)
+
     @unittest.skipIf(not HAVE_YAML, "PyYAML module is not available")
     def test_extensions_yaml_file(self) -> None:
         with TemporaryDirectory() as tmpdirname:
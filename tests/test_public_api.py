@@ -3,10 +3,40 @@
 # Copyright: (C) Dmitry Shachnev, 2012-2022
 
 import importlib
+import io
+import subprocess
+import sys
 import unittest
+import warnings
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import Any
+from unittest import mock
 
 import markups
-from markups.common import get_pygments_stylesheet
+from markups.abstract import ConvertedMarkup
+from markups.common import (
+    MATHJAX_WEB_URL,
+    _get_pygments_stylesheet,
+    clear_mathjax_cache,
+    clear_pygments_stylesheet_cache,
+    get_mathjax_url_and_version,
+    get_pygments_stylesheet,
+    read_text_file,
+    warm_up_pygments_stylesheets,
+)
+
+
+class FailingMarkup(markups.AbstractMarkup):
+    """Markup that fails to convert documents starting with "!"."""
+
+    name = "Failing"
+    file_extensions = (".fail",)
+
+    def convert(self, text: str) -> ConvertedMarkup:
+        if text.startswith("!"):
+            raise ValueError(text)
+        return ConvertedMarkup(text)
 
 
 class APITest(unittest.TestCase):
@@ -25,6 +55,64 @@ class APITest(unittest.TestCase):
         )
         self.assertEqual(markups.AsciiDocMarkup, markup_class)
 
+    def test_lazy_imports(self) -> None:
+        script = (
+            "import sys, markups\n"
+            "backends = 'markdown', 'docutils', 'yaml', 'textile', 'asciidoc', "
+            "'pygments'\n"
+            "print(*(name for name in backends if name in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        self.assertEqual(result.stdout, "\n")
+
+    def test_submodules(self) -> None:
+        for name in "markdown", "restructuredtext", "textile", "asciidoc":
+            module = importlib.import_module(f"markups.{name}")
+            self.assertIs(getattr(markups, name), module)
+            self.assertIs(markups.__getattr__(name), module)
+        self.assertRaises(AttributeError, getattr, markups, "nonexistent")
+
+    def test_markups_cache(self) -> None:
+        class FakeEntryPoint:
+            def __init__(self, markup: type[markups.AbstractMarkup]):
+                self.markup = markup
+
+            def load(self) -> type[markups.AbstractMarkup]:
+                return self.markup
+
+        class CustomMarkup(markups.AbstractMarkup):
+            name = "Custom"
+            file_extensions = (".custom.md", "README")
+
+        entry_points = [
+            FakeEntryPoint(markups.MarkdownMarkup),
+            FakeEntryPoint(CustomMarkup),
+        ]
+        self.addCleanup(markups.clear_markups_cache)
+        markups.clear_markups_cache()
+        with mock.patch(
+            "importlib.metadata.entry_points",
+            return_value=entry_points,
+        ) as patched:
+            self.assertEqual(
+                markups.get_all_markups(),
+                [markups.MarkdownMarkup, CustomMarkup],
+            )
+            find = markups.get_markup_for_file_name
+            self.assertIs(find("a.custom.md", return_class=True), CustomMarkup)
+            self.assertIs(find("a.md", return_class=True), markups.MarkdownMarkup)
+            self.assertIs(find("/tmp/README", return_class=True), CustomMarkup)
+            self.assertIsNone(find("a.rst", return_class=True))
+            self.assertIs(markups.find_markup_class_by_name("CUSTOM"), CustomMarkup)
+            self.assertEqual(patched.call_count, 1)
+        markups.clear_markups_cache()
+        self.assertNotIn(CustomMarkup, markups.get_all_markups())
+
     @unittest.skipUnless(markups.MarkdownMarkup.available(), "Markdown not available")
     def test_api_instance(self) -> None:
         markup = markups.get_markup_for_file_name("myfile.mkd")
@@ -35,6 +123,54 @@ class APITest(unittest.TestCase):
         available_markups = markups.get_available_markups()
         self.assertIn(markups.MarkdownMarkup, available_markups)
 
+    @unittest.skipUnless(markups.MarkdownMarkup.available(), "Markdown not available")
+    def test_convert_many(self) -> None:
+        items = [(f"file{i}.mkd", f"Document *{i}*") for i in range(20)]
+        items.insert(5, ("unknown.txt", "Unknown markup"))
+        results = list(markups.convert_many(items, ordered=True, max_workers=2))
+        self.assertEqual([name for name, _ in results], [name for name, _ in items])
+        self.assertIsNone(results[5][1])
+        converted = results[6][1]
+        assert converted is not None
+        self.assertEqual(converted.get_document_body(), "<p>Document <em>5</em></p>\n")
+        results = list(markups.convert_many(items, max_workers=2, max_pending=3))
+        self.assertCountEqual([name for name, _ in results], [n for n, _ in items])
+
+    def test_convert_many_exceptions(self) -> None:
+        items = [("good.fail", "Good"), ("bad.fail", "!Bad")]
+        with mock.patch("markups.get_markup_for_file_name") as get_markup:
+            get_markup.return_value = FailingMarkup
+            results = dict(
+                markups.convert_many(items, max_workers=1, return_exceptions=True),
+            )
+            with self.assertRaisesRegex(ValueError, "!Bad"):
+                list(markups.convert_many(items, max_workers=1))
+        converted = results["good.fail"]
+        assert isinstance(converted, ConvertedMarkup)
+        self.assertEqual(converted.get_document_body(), "Good")
+        self.assertIsInstance(results["bad.fail"], ValueError)
+
+    @unittest.skipUnless(markups.TextileMarkup.available(), "Textile not available")
+    def test_warmup(self) -> None:
+        self.addCleanup(clear_mathjax_cache)
+        clear_pygments_stylesheet_cache()
+        with mock.patch.object(
+            markups.TextileMarkup,
+            "convert",
+            autospec=True,
+            side_effect=lambda self, text: ConvertedMarkup(text),
+        ) as convert:
+            result = markups.warmup(["textile"])
+        self.assertEqual(result, [markups.TextileMarkup])
+        convert.assert_called_once()
+        self.assertGreater(_get_pygments_stylesheet.cache_info().currsize, 0)
+        with mock.patch("os.path.exists") as exists:
+            get_mathjax_url_and_version(webenv=False)
+        exists.assert_not_called()
+        with self.assertRaisesRegex(ValueError, "Unknown markup: foo"):
+            markups.warmup(["foo"])
+        self.assertIn(markups.MarkdownMarkup, markups.warmup())
+
     def test_get_pygments_stylesheet(self) -> None:
         try:
             importlib.import_module("pygments.formatters")
@@ -45,3 +181,106 @@ class APITest(unittest.TestCase):
         stylesheet = get_pygments_stylesheet(".selector", style="colorful")
         self.assertIn(".selector .nf { color: #06B", stylesheet)
         self.assertFalse(get_pygments_stylesheet(".selector", style=""))
+
+    def test_pygments_stylesheet_cache(self) -> None:
+        try:
+            importlib.import_module("pygments.formatters")
+        except ImportError:
+            raise unittest.SkipTest("Pygments not available")
+        clear_pygments_stylesheet_cache()
+        warm_up_pygments_stylesheets(["default", "colorful"])
+        self.assertEqual(_get_pygments_stylesheet.cache_info().currsize, 6)
+        with mock.patch("pygments.formatters.HtmlFormatter") as formatter:
+            stylesheet = get_pygments_stylesheet(".code", style="colorful")
+        formatter.assert_not_called()
+        self.assertIn(".code .nf { color: #06B", stylesheet)
+        clear_pygments_stylesheet_cache()
+        self.assertEqual(_get_pygments_stylesheet.cache_info().currsize, 0)
+
+    def test_mathjax_url_cache(self) -> None:
+        self.addCleanup(clear_mathjax_cache)
+        clear_mathjax_cache()
+        with mock.patch("os.path.exists", return_value=False) as exists:
+            get_mathjax_url_and_version(webenv=False)
+            result = get_mathjax_url_and_version(webenv=False)
+        self.assertEqual(result, (MATHJAX_WEB_URL, 3))
+        self.assertEqual(exists.call_count, 4)
+        clear_mathjax_cache()
+        environ = {"MARKUPS_MATHJAX_URL": "file:///opt/mathjax/MathJax.js"}
+        with (
+            mock.patch.dict("os.environ", environ),
+            mock.patch("os.path.exists") as exists,
+        ):
+            result = get_mathjax_url_and_version(webenv=False)
+        exists.assert_not_called()
+        self.assertEqual(result, ("file:///opt/mathjax/MathJax.js", 2))
+        self.assertEqual(get_mathjax_url_and_version(webenv=True)[0], MATHJAX_WEB_URL)
+        for version, expected in (("3", 3), ("2.7", 2), ("x", 2)):
+            clear_mathjax_cache()
+            environ["MARKUPS_MATHJAX_VERSION"] = version
+            with mock.patch.dict("os.environ", environ), warnings.catch_warnings():
+                warnings.simplefilter("error" if expected == 3 else "ignore")
+                result = get_mathjax_url_and_version(webenv=False)
+            self.assertEqual(result[1], expected)
+        clear_mathjax_cache()
+        with (
+            mock.patch.dict("os.environ", environ),
+            self.assertWarnsRegex(RuntimeWarning, "MARKUPS_MATHJAX_VERSION"),
+        ):
+            get_mathjax_url_and_version(webenv=False)
+
+    def test_write_whole_html(self) -> None:
+        converted = ConvertedMarkup("<p>Тест</p>\n" * 50000, "Title", "p {}\n")
+        html = converted.get_whole_html(custom_headers="<meta>\n")
+        text_output = io.StringIO()
+        converted.write_whole_html(text_output, custom_headers="<meta>\n")
+        self.assertEqual(text_output.getvalue(), html)
+        binary_output = io.BytesIO()
+        converted.write_whole_html(binary_output, custom_headers="<meta>\n")
+        self.assertEqual(binary_output.getvalue(), html.encode())
+
+        class PartialWriter(io.RawIOBase):
+            """Writes at most 1000 bytes at a time."""
+
+            def __init__(self) -> None:
+                self.data = bytearray()
+
+            def writable(self) -> bool:
+                return True
+
+            def write(self, b: Any) -> int:
+                chunk = bytes(b[:1000])
+                self.data += chunk
+                return len(chunk)
+
+        raw_output = PartialWriter()
+        converted.write_whole_html(raw_output, custom_headers="<meta>\n")
+        self.assertFalse(raw_output.closed)
+        self.assertEqual(bytes(raw_output.data), html.encode())
+
+    def test_read_text_file(self) -> None:
+        with TemporaryDirectory() as tmpdirname:
+            path = join(tmpdirname, "file.txt")
+            for data, encoding in (
+                (b"", "utf-8"),
+                ("\u0422\u0435\u0441\u0442\n".encode(), "utf-8"),
+                (b"one\r\ntwo\rthree\n", "utf-8"),
+                ("\u0422\u0435\u0441\u0442\r\n".encode("cp1251"), "cp1251"),
+            ):
+                with open(path, "wb") as f:
+                    f.write(data)
+                with open(path, encoding=encoding) as f:
+                    self.assertEqual(read_text_file(path, encoding), f.read())
+
+    @unittest.skipUnless(markups.TextileMarkup.available(), "Textile not available")
+    def test_convert_file(self) -> None:
+        markup = markups.TextileMarkup()
+        with TemporaryDirectory() as tmpdirname:
+            path = join(tmpdirname, "file.textile")
+            with open(path, "wb") as f:
+                f.write(b"h1. Hello\r\n\r\nSome text.\r\n")
+            converted = markup.convert_file(path)
+        self.assertEqual(
+            converted.get_document_body(),
+            markup.convert("h1. Hello\n\nSome text.\n").get_document_body(),
+        )
@@ -3,8 +3,9 @@
 # Copyright: (C) Dmitry Shachnev, 2012-2025
 
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
-from markups import ReStructuredTextMarkup
+from markups import ReStructuredTextMarkup, restructuredtext
 
 basic_text = """\
 Hello, world!
@@ -79,6 +80,15 @@ class ReStructuredTextTest(unittest.TestCase):
         body = markup.convert("`").get_document_body()  # unclosed role
         self.assertNotIn("System Message", body)
 
+    def test_overrides_changed(self) -> None:
+        overrides = {"warning_stream": False}
+        markup = ReStructuredTextMarkup(settings_overrides=overrides)
+        self.assertNotIn("report_level", overrides)
+        self.assertIn("System Message", markup.convert("`").get_document_body())
+        markup.overrides["report_level"] = 4
+        self.assertNotIn("System Message", markup.convert("`").get_document_body())
+        self.assertEqual(markup.get_options()["settings_overrides"]["report_level"], 4)
+
     def test_errors_severe(self) -> None:
         markup = ReStructuredTextMarkup(settings_overrides={"warning_stream": False})
         text = "***************\nfaulty headline"
@@ -100,3 +110,57 @@ class ReStructuredTextTest(unittest.TestCase):
         markup = ReStructuredTextMarkup()
         body = markup.convert(toc_backrefs_source).get_document_body()
         self.assertIn('<a class="toc-backref"', body)
+
+    def test_position_index(self) -> None:
+        markup = ReStructuredTextMarkup()
+        converted = markup.convert(basic_text)
+        body = converted.get_document_body()
+        index = converted.get_position_index()
+        self.assertEqual(index.typecode, "I")
+        self.assertEqual(index[0::2].tolist(), [2, 7])
+        self.assertEqual(
+            body[index[1] :].split(">")[0],
+            '<h1 class="title" data-posmap="2"',
+        )
+        self.assertEqual(body[index[3] :].split(">")[0], '<p data-posmap="7"')
+        self.assertIs(converted.get_position_index(), index)
+        self.assertIsNone(converted.get_offset_for_line(1))
+        self.assertEqual(converted.get_offset_for_line(2), index[1])
+        self.assertEqual(converted.get_offset_for_line(6), index[1])
+        self.assertEqual(converted.get_offset_for_line(7), index[3])
+        self.assertEqual(converted.get_offset_for_line(1000), index[3])
+
+    def test_position_index_marker_in_text(self) -> None:
+        for text in (
+            "Text \x02posmap-line:99\x03 here",
+            'Text data-posmap="\x02posmap-line:99\x03" here',
+        ):
+            converted = ReStructuredTextMarkup().convert(text)
+            self.assertEqual(converted.get_position_index().tolist(), [1, 7])
+            self.assertIn("\x02posmap-line:99\x03", converted.body)
+
+    def test_module_attributes(self) -> None:
+        self.assertTrue(restructuredtext.HAVE_DOCUTILS)
+        translator_class = restructuredtext.CustomHTMLTranslator
+        self.assertEqual(translator_class.__name__, "CustomHTMLTranslator")
+        writer = ReStructuredTextMarkup().writer
+        self.assertIs(writer.translator_class, translator_class)
+
+    def test_threads(self) -> None:
+        markup = ReStructuredTextMarkup(settings_overrides={"warning_stream": False})
+        sources = [
+            basic_text,
+            toc_backrefs_source,
+            "Hello, :math:`2+2`!",
+            "`",
+            "***************\nfaulty headline",
+        ] * 40
+        expected = [markup.convert(source).get_document_body() for source in sources]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda source: markup.convert(source).get_document_body(),
+                    sources,
+                ),
+            )
+        self.assertEqual(results, expected)
@@ -13,3 +13,8 @@ class TextileTest(unittest.TestCase):
         markup = TextileMarkup()
         html = markup.convert("Hello, **world**!").get_document_body()
         self.assertEqual(html, "\t<p>Hello, <b>world</b>!</p>")
+
+    def test_position_index(self) -> None:
+        converted = TextileMarkup().convert('<div data-posmap="99">x</div>')
+        self.assertEqual(len(converted.get_position_index()), 0)
+        self.assertIsNone(converted.get_offset_for_line(100))